@@ -5,7 +5,7 @@ from sqlalchemy import pool
 from alembic import context
 
 # Import all models here
-from app.models import User, Event, Mentoring, Classroom, Presence, EventParticipation
+from app.models import User, Event, Mentoring, Classroom, Presence, EventParticipation, OccupancyBaseline, JobRun, MaterializedViewRefresh, EventSimilarity, IdempotencyKey, OutboxRecord
 from app.database import Base
 
 # this is the Alembic Config object, which provides
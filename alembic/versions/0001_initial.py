@@ -0,0 +1,135 @@
+"""Initial migration
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    # Les bases existantes ont été créées par Base.metadata.create_all :
+    # on ne recrée que les tables manquantes
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table('users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('email', sa.String(length=100), nullable=False),
+            sa.Column('password', sa.String(length=255), nullable=False),
+            sa.Column('level', sa.String(length=50), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+
+    if not _has_table('classrooms'):
+        op.create_table(
+            'classrooms',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('capacity', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_classrooms_id'), 'classrooms', ['id'], unique=False)
+
+    if not _has_table('events'):
+        op.create_table(
+            'events',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('category', sa.String(length=100), nullable=False),
+            sa.Column('attendance', sa.String(length=50), nullable=True),
+            sa.Column('place', sa.String(length=200), nullable=False),
+            sa.Column('image_url', sa.String(length=500), nullable=True),
+            sa.Column('date_start', sa.Date(), nullable=False),
+            sa.Column('date_end', sa.Date(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_events_id'), 'events', ['id'], unique=False)
+
+    if not _has_table('mentoring'):
+        op.create_table(
+            'mentoring',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('mentor_id', sa.Integer(), nullable=False),
+            sa.Column('sponsored_id', sa.Integer(), nullable=False),
+            sa.Column('subject', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['mentor_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['sponsored_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_mentoring_id'), 'mentoring', ['id'], unique=False)
+
+    if not _has_table('presences'):
+        op.create_table(
+            'presences',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('presence', sa.Boolean(), nullable=False),
+            sa.Column('classroom_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['classroom_id'], ['classrooms.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_presences_id'), 'presences', ['id'], unique=False)
+
+    if not _has_table('event_participations'):
+        op.create_table(
+            'event_participations',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('event_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('is_attending', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('event_id', 'user_id', name='unique_event_user')
+        )
+        op.create_index(op.f('ix_event_participations_id'), 'event_participations', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_event_participations_id'), table_name='event_participations')
+    op.drop_table('event_participations')
+    op.drop_index(op.f('ix_presences_id'), table_name='presences')
+    op.drop_table('presences')
+    op.drop_index(op.f('ix_mentoring_id'), table_name='mentoring')
+    op.drop_table('mentoring')
+    op.drop_index(op.f('ix_events_id'), table_name='events')
+    op.drop_table('events')
+    op.drop_index(op.f('ix_classrooms_id'), table_name='classrooms')
+    op.drop_table('classrooms')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,41 @@
+"""Création table OccupancyBaseline
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'occupancy_baselines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('classroom_id', sa.Integer(), nullable=False),
+        sa.Column('weekday', sa.Integer(), nullable=False),
+        sa.Column('hour', sa.Integer(), nullable=False),
+        sa.Column('expected_presences', sa.Float(), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.Column('last_observed_date', sa.Date(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['classroom_id'], ['classrooms.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('classroom_id', 'weekday', 'hour', name='unique_classroom_weekday_hour')
+    )
+    op.create_index(op.f('ix_occupancy_baselines_id'), 'occupancy_baselines', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_occupancy_baselines_id'), table_name='occupancy_baselines')
+    op.drop_table('occupancy_baselines')
@@ -0,0 +1,70 @@
+"""Vues matérialisées pour les tableaux de bord salles et événements
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'materialized_view_refreshes',
+        sa.Column('view_name', sa.String(length=100), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('source_modifications', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('view_name')
+    )
+
+    # Affluence quotidienne par salle (classement de /presences/analytics/overview)
+    op.execute("""
+        CREATE MATERIALIZED VIEW classroom_daily_affluence AS
+        SELECT
+            c.id AS classroom_id,
+            c.name AS classroom_name,
+            c.capacity AS capacity,
+            date(p.timestamp) AS day,
+            count(*) FILTER (WHERE p.presence) AS presence_count,
+            count(*) FILTER (WHERE NOT p.presence) AS absence_count
+        FROM classrooms c
+        JOIN presences p ON p.classroom_id = c.id
+        GROUP BY c.id, c.name, c.capacity, date(p.timestamp)
+    """)
+    # L'index unique est requis par REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("CREATE UNIQUE INDEX ux_classroom_daily_affluence ON classroom_daily_affluence (classroom_id, day)")
+    op.execute("CREATE INDEX ix_classroom_daily_affluence_day ON classroom_daily_affluence (day)")
+
+    # Participation par événement
+    op.execute("""
+        CREATE MATERIALIZED VIEW event_attendance_summary AS
+        SELECT
+            e.id AS event_id,
+            count(ep.id) FILTER (WHERE ep.is_attending) AS participant_count,
+            count(ep.id) FILTER (WHERE NOT ep.is_attending) AS cancelled_count
+        FROM events e
+        LEFT JOIN event_participations ep ON ep.event_id = e.id
+        GROUP BY e.id
+    """)
+    op.execute("CREATE UNIQUE INDEX ux_event_attendance_summary ON event_attendance_summary (event_id)")
+
+    op.execute("""
+        INSERT INTO materialized_view_refreshes (view_name, refreshed_at, source_modifications)
+        VALUES ('classroom_daily_affluence', now(), 0), ('event_attendance_summary', now(), 0)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS event_attendance_summary")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS classroom_daily_affluence")
+    op.drop_table('materialized_view_refreshes')
@@ -0,0 +1,46 @@
+"""Recherche plein texte et approximative sur les événements
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('events', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('french', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('french', coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('french', coalesce(place, '')), 'C')",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    op.create_index('ix_events_search_vector', 'events', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_events_title_trgm', 'events', ['title'], unique=False,
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_title_trgm', table_name='events')
+    op.drop_index('ix_events_search_vector', table_name='events')
+    op.drop_column('events', 'search_vector')
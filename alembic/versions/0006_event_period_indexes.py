@@ -0,0 +1,31 @@
+"""Index de périodes des événements (calendrier et événements à venir)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_events_period', 'events', [sa.text("daterange(date_start, date_end, '[]')")],
+        unique=False, postgresql_using='gist'
+    )
+    op.create_index('ix_events_date_start_id', 'events', ['date_start', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_date_start_id', table_name='events')
+    op.drop_index('ix_events_period', table_name='events')
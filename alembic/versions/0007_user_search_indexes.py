@@ -0,0 +1,32 @@
+"""Index de recherche des utilisateurs par préfixe (typeahead)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # pg_trgm est installée par la migration 0005
+    # Collation "C" : l'index sert à la fois LIKE 'préfixe%' et le tri des résultats
+    op.execute('CREATE INDEX ix_users_name_prefix ON users ((lower(name) COLLATE "C"))')
+    op.execute('CREATE INDEX ix_users_email_prefix ON users ((lower(email) COLLATE "C"))')
+    op.execute("CREATE INDEX ix_users_name_trgm ON users USING gin (lower(name) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_name_trgm', table_name='users')
+    op.drop_index('ix_users_email_prefix', table_name='users')
+    op.drop_index('ix_users_name_prefix', table_name='users')
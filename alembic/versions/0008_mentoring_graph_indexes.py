@@ -0,0 +1,28 @@
+"""Index de parcours du graphe de mentorat
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_mentoring_mentor_sponsored', 'mentoring', ['mentor_id', 'sponsored_id'])
+    op.create_index('ix_mentoring_sponsored_mentor', 'mentoring', ['sponsored_id', 'mentor_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mentoring_sponsored_mentor', table_name='mentoring')
+    op.drop_index('ix_mentoring_mentor_sponsored', table_name='mentoring')
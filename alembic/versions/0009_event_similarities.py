@@ -0,0 +1,35 @@
+"""Création table EventSimilarity (recommandations d'événements)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'event_similarities',
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('similar_event_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('event_id', 'similar_event_id')
+    )
+    op.create_index('ix_event_participations_user_event', 'event_participations', ['user_id', 'event_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_participations_user_event', table_name='event_participations')
+    op.drop_table('event_similarities')
@@ -0,0 +1,36 @@
+"""Index de synchronisation incrémentale (date d'écriture) et des suppressions du journal
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+# Tables synchronisées par ?updated_since= : index sur (coalesce(updated_at, created_at), id)
+SYNCED_TABLES = ['users', 'events', 'classrooms', 'mentoring', 'event_participations']
+
+
+def upgrade() -> None:
+    for table in SYNCED_TABLES:
+        op.create_index(
+            f'ix_{table}_modified', table,
+            [sa.text('coalesce(updated_at, created_at)'), 'id'], unique=False
+        )
+    op.create_index('ix_outbox_deletes', 'outbox', ['entity', 'created_at'], unique=False, postgresql_where=sa.text("operation = 'delete'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_deletes', table_name='outbox', postgresql_where=sa.text("operation = 'delete'"))
+    for table in SYNCED_TABLES:
+        op.drop_index(f'ix_{table}_modified', table_name=table)
@@ -7,6 +7,12 @@ from app.models.mentoring import Mentoring
 from app.models.classroom import Classroom
 from app.models.presence import Presence
 from app.models.event_participation import EventParticipation
+from app.models.occupancy_baseline import OccupancyBaseline
+from app.models.job_run import JobRun
+from app.models.materialized_view_refresh import MaterializedViewRefresh
+from app.models.event_similarity import EventSimilarity
+from app.models.idempotency_key import IdempotencyKey
+from app.models.outbox_record import OutboxRecord
 
 # Export all models
-__all__ = ["User", "Event", "Mentoring", "Classroom", "Presence", "EventParticipation"] 
\ No newline at end of file
+__all__ = ["User", "Event", "Mentoring", "Classroom", "Presence", "EventParticipation", "OccupancyBaseline", "JobRun", "MaterializedViewRefresh", "EventSimilarity", "IdempotencyKey", "OutboxRecord"] 
\ No newline at end of file
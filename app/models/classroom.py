@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -13,4 +13,9 @@ class Classroom(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relations
-    presences = relationship("Presence", back_populates="classroom") 
\ No newline at end of file
+    presences = relationship("Presence", back_populates="classroom")
+
+    __table_args__ = (
+        # Synchronisation incrémentale : lignes écrites depuis une date, par (date d'écriture, id)
+        Index("ix_classrooms_modified", func.coalesce(updated_at, created_at), id),
+    ) 
\ No newline at end of file
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Computed, Index, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Configuration de recherche plein texte (doit correspondre à la migration 0005)
+EVENT_SEARCH_CONFIG = "french"
+
 class Event(Base):
     __tablename__ = "events"
     
@@ -17,6 +21,28 @@ class Event(Base):
     date_end = Column(Date, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Document de recherche calculé par PostgreSQL (titre > description > lieu)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{EVENT_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{EVENT_SEARCH_CONFIG}', coalesce(description, '')), 'B') || "
+        f"setweight(to_tsvector('{EVENT_SEARCH_CONFIG}', coalesce(place, '')), 'C')",
+        persisted=True
+    )))
     
     # Relations
-    participations = relationship("EventParticipation", back_populates="event")
\ No newline at end of file
+    participations = relationship("EventParticipation", back_populates="event")
+
+    __table_args__ = (
+        Index("ix_events_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_events_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        # Chevauchement de périodes (calendrier) : daterange(date_start, date_end, '[]') && période
+        Index(
+            "ix_events_period",
+            func.daterange(date_start, date_end, literal_column("'[]'")),
+            postgresql_using="gist"
+        ),
+        # Événements à venir paginés par (date_start, id)
+        Index("ix_events_date_start_id", "date_start", "id"),
+        # Synchronisation incrémentale : lignes écrites depuis une date, par (date d'écriture, id)
+        Index("ix_events_modified", func.coalesce(updated_at, created_at), id),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -13,8 +13,14 @@ class EventParticipation(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # Contrainte unique pour éviter les doublons
-    __table_args__ = (UniqueConstraint('event_id', 'user_id', name='unique_event_user'),)
+    __table_args__ = (
+        # Contrainte unique pour éviter les doublons
+        UniqueConstraint('event_id', 'user_id', name='unique_event_user'),
+        # Événements d'un utilisateur (recommandations, tableau de bord) sans parcourir la table
+        Index('ix_event_participations_user_event', 'user_id', 'event_id'),
+        # Synchronisation incrémentale : lignes écrites depuis une date, par (date d'écriture, id)
+        Index('ix_event_participations_modified', func.coalesce(updated_at, created_at), id),
+    )
     
     # Relations
     event = relationship("Event", back_populates="participations")
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class EventSimilarity(Base):
+    __tablename__ = "event_similarities"
+    
+    # Clé primaire (event_id, similar_event_id) : les voisins d'un événement sont lus par l'index.
+    # Pas de clé étrangère : la table est entièrement recalculée (COPY sans contrôle par ligne),
+    # et les lectures la joignent aux événements existants
+    event_id = Column(Integer, primary_key=True)
+    similar_event_id = Column(Integer, primary_key=True)
+    score = Column(Float, nullable=False)  # similarité cosinus (co-participation et catégorie)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
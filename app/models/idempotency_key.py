@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)  # empreinte de (méthode, chemin, clé, auteur)
+    fingerprint = Column(String(64), nullable=False)  # empreinte du corps de la requête
+    status_code = Column(Integer, nullable=True)  # NULL tant que la requête est en cours
+    headers = Column(JSON, nullable=True)
+    body = Column(LargeBinary, nullable=True)  # corps de la réponse compressé (zlib)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class MaterializedViewRefresh(Base):
+    __tablename__ = "materialized_view_refreshes"
+
+    view_name = Column(String(100), primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Compteur de modifications des tables sources (pg_stat_user_tables) au moment du rafraîchissement
+    source_modifications = Column(BigInteger, nullable=False, default=0)
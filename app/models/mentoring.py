@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -16,4 +16,12 @@ class Mentoring(Base):
     
     # Relations
     mentor = relationship("User", foreign_keys=[mentor_id], back_populates="mentor_relationships")
-    sponsored = relationship("User", foreign_keys=[sponsored_id], back_populates="sponsored_relationships") 
\ No newline at end of file
+    sponsored = relationship("User", foreign_keys=[sponsored_id], back_populates="sponsored_relationships")
+
+    __table_args__ = (
+        # Parcours du graphe dans les deux sens ; l'autre extrémité est dans l'index (parcours sans lecture de la table)
+        Index("ix_mentoring_mentor_sponsored", "mentor_id", "sponsored_id"),
+        Index("ix_mentoring_sponsored_mentor", "sponsored_id", "mentor_id"),
+        # Synchronisation incrémentale : lignes écrites depuis une date, par (date d'écriture, id)
+        Index("ix_mentoring_modified", func.coalesce(updated_at, created_at), id),
+    )
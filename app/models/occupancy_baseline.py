@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class OccupancyBaseline(Base):
+    __tablename__ = "occupancy_baselines"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    classroom_id = Column(Integer, ForeignKey("classrooms.id", ondelete="CASCADE"), nullable=False)
+    weekday = Column(Integer, nullable=False)  # 0 = lundi, 6 = dimanche
+    hour = Column(Integer, nullable=False)  # 0 à 23
+    expected_presences = Column(Float, nullable=False, default=0.0)  # moyenne mobile exponentielle
+    samples = Column(Integer, nullable=False, default=0)  # nombre de jours intégrés
+    last_observed_date = Column(Date, nullable=False)  # dernier jour intégré dans la moyenne
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Une seule ligne par salle, jour de la semaine et heure
+    __table_args__ = (UniqueConstraint('classroom_id', 'weekday', 'hour', name='unique_classroom_weekday_hour'),)
+    
+    # Relations
+    classroom = relationship("Classroom")
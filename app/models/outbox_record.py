@@ -0,0 +1,25 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+class OutboxRecord(Base):
+    __tablename__ = "outbox"
+
+    id = Column(BigInteger, primary_key=True)
+    # Transaction d'écriture : le flux ne lit que les transactions terminées, dans l'ordre (txid, id)
+    txid = Column(BigInteger, nullable=False, server_default=text("pg_current_xact_id()::text::bigint"))
+    entity = Column(String(50), nullable=False)  # table modifiée (users, events, ...)
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)  # insert, update, delete
+    payload = Column(JSONB, nullable=True)  # ligne après écriture (NULL pour une suppression)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = Column(DateTime(timezone=True), nullable=True)  # publication par le relais
+
+    __table_args__ = (
+        Index("ix_outbox_txid_id", "txid", "id"),
+        # File du relais : seules les lignes non publiées sont indexées
+        Index("ix_outbox_unpublished", "txid", "id", postgresql_where=text("published_at IS NULL")),
+        # Suppressions d'une entité depuis une date (synchronisation incrémentale des listes)
+        Index("ix_outbox_deletes", "entity", "created_at", postgresql_where=text("operation = 'delete'")),
+    )
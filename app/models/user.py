@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -18,4 +18,14 @@ class User(Base):
     mentor_relationships = relationship("Mentoring", foreign_keys="Mentoring.mentor_id", back_populates="mentor")
     sponsored_relationships = relationship("Mentoring", foreign_keys="Mentoring.sponsored_id", back_populates="sponsored")
     presences = relationship("Presence", back_populates="user")
-    event_participations = relationship("EventParticipation", back_populates="user") 
\ No newline at end of file
+    event_participations = relationship("EventParticipation", back_populates="user")
+
+    __table_args__ = (
+        # Recherche par préfixe (typeahead) : lower(colonne) COLLATE "C" LIKE 'saisie%', trié par ce même ordre
+        Index("ix_users_name_prefix", func.lower(name).collate("C")),
+        Index("ix_users_email_prefix", func.lower(email).collate("C")),
+        # Début d'un mot quelconque du nom (nom de famille) : lower(name) LIKE '% saisie%'
+        Index("ix_users_name_trgm", func.lower(name).label("name_lower"), postgresql_using="gin", postgresql_ops={"name_lower": "gin_trgm_ops"}),
+        # Synchronisation incrémentale : lignes écrites depuis une date, par (date d'écriture, id)
+        Index("ix_users_modified", func.coalesce(updated_at, created_at), id),
+    )
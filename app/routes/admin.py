@@ -0,0 +1,32 @@
+import io
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.user import User
+from app.utils.auth import require_admin
+from app.utils.bulk_import import ImportEntity, import_csv
+from app.utils.negotiation import NegotiatedRoute
+
+router = APIRouter(prefix="/admin", tags=["admin"], route_class=NegotiatedRoute)
+
+@router.post("/import/{entity}")
+def bulk_import(
+    entity: ImportEntity,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Importer en masse des utilisateurs, salles ou événements depuis un fichier CSV"""
+    # Lecture en flux du fichier déposé (mis en tampon sur disque par Starlette)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_csv(db, entity, stream)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    finally:
+        stream.detach()
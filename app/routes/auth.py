@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.user import User
-from app.schemas import UserCreate, UserLogin, Token, UserResponse
+from app.schemas import UserCreate, UserLogin, Token, UserResponse, check_client_level
 from app.utils.auth import (
     authenticate_user, 
     create_access_token, 
@@ -13,8 +13,9 @@ from app.utils.auth import (
     get_password_hash,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from app.utils.negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=NegotiatedRoute)
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def register(user: UserCreate, db: Session = Depends(get_db)):
@@ -96,6 +97,22 @@ def update_current_user(
             detail="Aucun champ valide à mettre à jour"
         )
     
+    # Corps libre : les types sont vérifiés ici plutôt que par un schéma
+    invalid = sorted(field for field, value in update_data.items() if not isinstance(value, str))
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Champs attendus sous forme de texte : {', '.join(invalid)}"
+        )
+    
+    try:
+        check_client_level(update_data.get("level"))
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(exc)
+        )
+    
     for field, value in update_data.items():
         setattr(current_user, field, value)
     
@@ -0,0 +1,34 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.user import User
+from app.schemas import ChangeFeed
+from app.utils.auth import require_admin
+from app.utils.outbox import ChangeEntity, read_changes
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.negotiation import NegotiatedRoute
+
+router = APIRouter(prefix="/changes", tags=["changes"], route_class=NegotiatedRoute)
+
+@router.get("/", response_model=ChangeFeed)
+def list_changes(
+    since: Optional[str] = None,
+    entity: Optional[ChangeEntity] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Modifications validées depuis le curseur ``since`` (toutes si absent), dans l'ordre"""
+    # Base principale : l'horizon des transactions terminées n'a de sens que sur le serveur qui écrit
+    after = None
+    if since:
+        position = decode_cursor(since, txid=int, id=int)
+        after = (position["txid"], position["id"])
+
+    rows = read_changes(db, after, limit + 1, entity)
+    page = rows[:limit]
+    next_cursor = encode_cursor({"txid": page[-1].txid, "id": page[-1].id}) if page else since
+    return {"items": page, "next_cursor": next_cursor, "has_more": len(rows) > limit}
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Union
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.classroom import Classroom
-from app.schemas import ClassroomCreate, ClassroomUpdate, Classroom as ClassroomSchema, ClassroomWithPresences
+from app.schemas import ClassroomCreate, ClassroomUpdate, Classroom as ClassroomSchema, ClassroomWithPresences, BatchResult, SyncPage
+from app.utils.batch import batch_ids, fetch_by_ids
+from app.utils.delta_sync import DeltaSync, delta_sync
+from app.utils.fields import FieldSelection, field_selection
+from app.utils.negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/classrooms", tags=["classrooms"])
+router = APIRouter(prefix="/classrooms", tags=["classrooms"], route_class=NegotiatedRoute)
 
 @router.post("/", response_model=ClassroomSchema, status_code=status.HTTP_201_CREATED)
 def create_classroom(classroom: ClassroomCreate, db: Session = Depends(get_db)):
@@ -24,14 +28,25 @@ def create_classroom(classroom: ClassroomCreate, db: Session = Depends(get_db)):
     db.refresh(db_classroom)
     return db_classroom
 
-@router.get("/", response_model=List[ClassroomSchema])
-def get_classrooms(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Récupérer toutes les salles de classe"""
-    classrooms = db.query(Classroom).offset(skip).limit(limit).all()
-    return classrooms
+@router.get("/", response_model=Union[List[ClassroomSchema], SyncPage[ClassroomSchema]])
+def get_classrooms(
+    skip: int = 0,
+    limit: int = 100,
+    selection: FieldSelection = Depends(field_selection(Classroom, ClassroomSchema)),
+    sync: DeltaSync = Depends(delta_sync(Classroom)),
+    db: Session = Depends(get_read_db)
+):
+    """Récupérer toutes les salles de classe (ou celles modifiées depuis updated_since)"""
+    classrooms = sync.fetch(db, db.query(Classroom).options(*selection.options()), skip, limit)
+    return sync.render(db, selection, classrooms)
+
+@router.get("/batch", response_model=BatchResult[ClassroomSchema])
+def get_classrooms_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    """Récupérer plusieurs salles de classe par leurs IDs"""
+    return fetch_by_ids(db, Classroom, ids)
 
 @router.get("/{classroom_id}", response_model=ClassroomSchema)
-def get_classroom(classroom_id: int, db: Session = Depends(get_db)):
+def get_classroom(classroom_id: int, db: Session = Depends(get_read_db)):
     """Récupérer une salle de classe par son ID"""
     classroom = db.query(Classroom).filter(Classroom.id == classroom_id).first()
     if classroom is None:
@@ -42,7 +57,7 @@ def get_classroom(classroom_id: int, db: Session = Depends(get_db)):
     return classroom
 
 @router.get("/{classroom_id}/with-presences", response_model=ClassroomWithPresences)
-def get_classroom_with_presences(classroom_id: int, db: Session = Depends(get_db)):
+def get_classroom_with_presences(classroom_id: int, db: Session = Depends(get_read_db)):
     """Récupérer une salle de classe avec ses présences"""
     classroom = db.query(Classroom).filter(Classroom.id == classroom_id).first()
     if classroom is None:
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
-from datetime import datetime, date
+from typing import List, Union
+from datetime import datetime, date, timezone
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.event_participation import EventParticipation
 from app.models.event import Event
 from app.models.user import User
@@ -13,11 +13,16 @@ from app.schemas import (
     EventParticipationUpdate, 
     EventParticipation as EventParticipationSchema,
     EventParticipationWithDetails,
-    EventWithParticipations
+    EventWithParticipations,
+    SyncPage
 )
 from app.utils.auth import get_current_user
+from app.utils.delta_sync import DeltaSync, delta_sync
+from app.utils.fields import FieldSelection, field_selection
+from app.utils.materialized_views import event_attendance_summary, view_freshness
+from app.utils.negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/event-participations", tags=["event-participations"])
+router = APIRouter(prefix="/event-participations", tags=["event-participations"], route_class=NegotiatedRoute)
 
 @router.post("/", response_model=EventParticipationSchema, status_code=status.HTTP_201_CREATED)
 def participate_to_event(participation: EventParticipationCreate, db: Session = Depends(get_db)):
@@ -63,17 +68,19 @@ def participate_to_event(participation: EventParticipationCreate, db: Session =
     db.refresh(db_participation)
     return db_participation
 
-@router.get("/", response_model=List[EventParticipationWithDetails])
+@router.get("/", response_model=Union[List[EventParticipationWithDetails], SyncPage[EventParticipationWithDetails]])
 def get_participations(
     skip: int = 0, 
     limit: int = 100, 
     event_id: int = None,
     user_id: int = None,
     is_attending: bool = None,
-    db: Session = Depends(get_db)
+    selection: FieldSelection = Depends(field_selection(EventParticipation, EventParticipationWithDetails)),
+    sync: DeltaSync = Depends(delta_sync(EventParticipation)),
+    db: Session = Depends(get_read_db)
 ):
-    """Récupérer les participations avec filtres"""
-    query = db.query(EventParticipation)
+    """Récupérer les participations avec filtres (ou celles modifiées depuis updated_since)"""
+    query = db.query(EventParticipation).options(*selection.options())
     
     if event_id:
         query = query.filter(EventParticipation.event_id == event_id)
@@ -84,11 +91,11 @@ def get_participations(
     if is_attending is not None:
         query = query.filter(EventParticipation.is_attending == is_attending)
     
-    participations = query.offset(skip).limit(limit).all()
-    return participations
+    participations = sync.fetch(db, query, skip, limit)
+    return sync.render(db, selection, participations)
 
 @router.get("/event/{event_id}/participants", response_model=List[EventParticipationWithDetails])
-def get_event_participants(event_id: int, db: Session = Depends(get_db)):
+def get_event_participants(event_id: int, db: Session = Depends(get_read_db)):
     """Récupérer tous les participants d'un événement"""
     # Vérifier que l'événement existe
     event = db.query(Event).filter(Event.id == event_id).first()
@@ -105,7 +112,7 @@ def get_event_participants(event_id: int, db: Session = Depends(get_db)):
     return participations
 
 @router.get("/event/{event_id}/participant-count", response_model=dict)
-def get_event_participant_count(event_id: int, db: Session = Depends(get_db)):
+def get_event_participant_count(event_id: int, db: Session = Depends(get_read_db)):
     """Obtenir le nombre de participants d'un événement"""
     # Vérifier que l'événement existe
     event = db.query(Event).filter(Event.id == event_id).first()
@@ -115,22 +122,29 @@ def get_event_participant_count(event_id: int, db: Session = Depends(get_db)):
             detail="Événement non trouvé"
         )
     
-    # Compter les participants
-    participant_count = db.query(EventParticipation).filter(
-        EventParticipation.event_id == event_id,
-        EventParticipation.is_attending == True
-    ).count()
+    # Compter les participants (vue matérialisée, ou comptage direct si l'événement n'y figure pas encore)
+    participant_count = db.query(event_attendance_summary.c.participant_count).filter(
+        event_attendance_summary.c.event_id == event_id
+    ).scalar()
+    freshness = view_freshness(db, "event_attendance_summary")
+    if participant_count is None:
+        participant_count = db.query(EventParticipation).filter(
+            EventParticipation.event_id == event_id,
+            EventParticipation.is_attending == True
+        ).count()
+        freshness = {"data_as_of": datetime.now(timezone.utc), "data_age_seconds": 0}
     
     return {
         "event_id": event_id,
         "event_title": event.title,
         "participant_count": participant_count,
         "expected_attendance": event.attendance,
-        "attendance_percentage": round((participant_count / int(event.attendance)) * 100, 2) if event.attendance and event.attendance.isdigit() and int(event.attendance) > 0 else 0
+        "attendance_percentage": round((participant_count / int(event.attendance)) * 100, 2) if event.attendance and event.attendance.isdigit() and int(event.attendance) > 0 else 0,
+        **freshness
     }
 
 @router.get("/user/{user_id}/events", response_model=List[EventWithParticipations])
-def get_user_events(user_id: int, db: Session = Depends(get_db)):
+def get_user_events(user_id: int, response: Response, db: Session = Depends(get_read_db)):
     """Obtenir tous les événements auxquels un utilisateur participe"""
     # Vérifier que l'utilisateur existe
     user = db.query(User).filter(User.id == user_id).first()
@@ -140,26 +154,34 @@ def get_user_events(user_id: int, db: Session = Depends(get_db)):
             detail="Utilisateur non trouvé"
         )
     
-    # Récupérer les événements avec le nombre de participants
-    events = db.query(Event).join(EventParticipation, Event.id == EventParticipation.event_id).filter(
+    # Récupérer les événements avec le nombre de participants (vue matérialisée)
+    events = db.query(Event, event_attendance_summary.c.participant_count).join(
+        EventParticipation, Event.id == EventParticipation.event_id
+    ).outerjoin(
+        event_attendance_summary, event_attendance_summary.c.event_id == Event.id
+    ).filter(
         EventParticipation.user_id == user_id,
         EventParticipation.is_attending == True
     ).all()
     
-    # Ajouter le nombre de participants pour chaque événement
+    # Les événements créés depuis le dernier rafraîchissement sont comptés directement
+    missing_ids = [event.id for event, participant_count in events if participant_count is None]
+    live_counts = dict(db.query(EventParticipation.event_id, func.count(EventParticipation.id)).filter(
+        EventParticipation.event_id.in_(missing_ids),
+        EventParticipation.is_attending == True
+    ).group_by(EventParticipation.event_id).all()) if missing_ids else {}
+    
     result = []
-    for event in events:
-        participant_count = db.query(EventParticipation).filter(
-            EventParticipation.event_id == event.id,
-            EventParticipation.is_attending == True
-        ).count()
-        
+    for event, participant_count in events:
         event_dict = {
             **event.__dict__,
-            "participant_count": participant_count
+            "participant_count": participant_count if participant_count is not None else live_counts.get(event.id, 0)
         }
         result.append(event_dict)
     
+    freshness = view_freshness(db, "event_attendance_summary")
+    if freshness["data_age_seconds"] is not None:
+        response.headers["X-Data-Age"] = str(freshness["data_age_seconds"])
     return result
 
 @router.put("/{participation_id}", response_model=EventParticipationSchema)
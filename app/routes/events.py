@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import Date, Float, func, literal_column, select, tuple_
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import date
+from typing import List, Optional, Union
+from datetime import date, timedelta
 
-from app.database import get_db
-from app.models.event import Event
-from app.schemas import EventCreate, EventUpdate, Event as EventSchema
+from app.database import get_db, get_read_db
+from app.models.event import Event, EVENT_SEARCH_CONFIG
+from app.models.user import User
+from app.schemas import EventCreate, EventUpdate, Event as EventSchema, EventSearchPage, EventCalendar, EventRecommendation, BatchResult, SyncPage
+from app.utils.auth import get_current_user
+from app.utils.batch import batch_ids, fetch_by_ids
+from app.utils.delta_sync import DeltaSync, delta_sync
+from app.utils.fields import FieldSelection, field_selection
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/events", tags=["events"])
+router = APIRouter(prefix="/events", tags=["events"], route_class=NegotiatedRoute)
+
+# Bornes du calendrier : une grille mensuelle avec ses jours débordants tient dans 62 jours
+CALENDAR_MAX_DAYS = 62
+CALENDAR_MAX_EVENTS_PER_DAY = 20
 
 @router.post("/", response_model=EventSchema, status_code=status.HTTP_201_CREATED)
 def create_event(event: EventCreate, db: Session = Depends(get_db)):
@@ -25,24 +37,152 @@ def create_event(event: EventCreate, db: Session = Depends(get_db)):
     db.refresh(db_event)
     return db_event
 
-@router.get("/", response_model=List[EventSchema])
+@router.get("/", response_model=Union[List[EventSchema], SyncPage[EventSchema]])
 def get_events(
     skip: int = 0, 
     limit: int = 100, 
     category: str = None,
-    db: Session = Depends(get_db)
+    selection: FieldSelection = Depends(field_selection(Event, EventSchema)),
+    sync: DeltaSync = Depends(delta_sync(Event)),
+    db: Session = Depends(get_read_db)
 ):
-    """Récupérer tous les événements avec filtres optionnels"""
-    query = db.query(Event)
+    """Récupérer tous les événements avec filtres optionnels (ou ceux modifiés depuis updated_since)"""
+    query = db.query(Event).options(*selection.options())
     
     if category:
         query = query.filter(Event.category == category)
     
-    events = query.offset(skip).limit(limit).all()
-    return events
+    events = sync.fetch(db, query, skip, limit)
+    return sync.render(db, selection, events)
+
+@router.get("/search", response_model=EventSearchPage)
+def search_events(
+    q: str = Query(..., min_length=2, max_length=200),
+    category: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Rechercher des événements (plein texte et tolérant aux fautes), classés par pertinence"""
+    ts_query = func.websearch_to_tsquery(EVENT_SEARCH_CONFIG, q)
+    # Pertinence plein texte (titre > description > lieu) + proximité du titre pour les fautes de frappe
+    score = (func.ts_rank(Event.search_vector, ts_query) + func.word_similarity(q, Event.title)).cast(Float)
+
+    # Les deux conditions sont servies par les index GIN (tsvector et trigrammes)
+    query = db.query(Event, score.label("score")).filter(
+        Event.search_vector.op("@@")(ts_query) | Event.title.op("%>")(q)
+    )
+    if category:
+        query = query.filter(Event.category == category)
+    # Événements qui chevauchent la période demandée
+    if date_from:
+        query = query.filter(Event.date_end >= date_from)
+    if date_to:
+        query = query.filter(Event.date_start <= date_to)
+
+    if cursor:
+        last = decode_cursor(cursor, score=float, id=int)
+        query = query.filter(tuple_(score, Event.id) < tuple_(last["score"], last["id"]))
+
+    rows = query.order_by(score.desc(), Event.id.desc()).limit(limit + 1).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last_event, last_score = page[-1]
+        next_cursor = encode_cursor({"score": last_score, "id": last_event.id})
+
+    return {
+        "items": [
+            {**EventSchema.model_validate(event).model_dump(), "score": round(event_score, 4)}
+            for event, event_score in page
+        ],
+        "next_cursor": next_cursor
+    }
+
+@router.get("/calendar", response_model=EventCalendar)
+def get_event_calendar(
+    date_from: date,
+    date_to: date,
+    category: Optional[str] = None,
+    per_day: int = Query(5, ge=1, le=CALENDAR_MAX_EVENTS_PER_DAY),
+    db: Session = Depends(get_read_db)
+):
+    """Calendrier : événements de chaque jour d'une période, prêts pour une grille mensuelle"""
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La date de fin doit être après la date de début"
+        )
+    if (date_to - date_from).days + 1 > CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"La période ne peut pas dépasser {CALENDAR_MAX_DAYS} jours"
+        )
+
+    days = select(
+        func.generate_series(date_from, date_to, timedelta(days=1)).cast(Date).label("day")
+    ).subquery("days")
+    # Jointure jour × événements en cours ce jour-là, servie par l'index GiST ix_events_period
+    period = func.daterange(Event.date_start, Event.date_end, literal_column("'[]'"))
+    ranked = select(
+        days.c.day,
+        Event.id,
+        Event.title,
+        Event.category,
+        Event.place,
+        Event.date_start,
+        Event.date_end,
+        func.row_number().over(partition_by=days.c.day, order_by=(Event.date_start, Event.id)).label("rank"),
+        func.count().over(partition_by=days.c.day).label("total")
+    ).join_from(days, Event, period.op("@>")(days.c.day))
+    if category:
+        ranked = ranked.where(Event.category == category)
+    ranked = ranked.subquery("ranked")
+
+    rows = db.execute(
+        select(ranked).where(ranked.c.rank <= per_day).order_by(ranked.c.day, ranked.c.rank)
+    ).all()
+
+    # Tous les jours de la période sont présents, même sans événement
+    buckets = {
+        date_from + timedelta(days=offset): {"date": date_from + timedelta(days=offset), "total": 0, "events": []}
+        for offset in range((date_to - date_from).days + 1)
+    }
+    for row in rows:
+        bucket = buckets[row.day]
+        bucket["total"] = row.total
+        bucket["events"].append({
+            "id": row.id,
+            "title": row.title,
+            "category": row.category,
+            "place": row.place,
+            "date_start": row.date_start,
+            "date_end": row.date_end
+        })
+
+    return {"date_from": date_from, "date_to": date_to, "days": list(buckets.values())}
+
+@router.get("/recommended", response_model=List[EventRecommendation])
+def get_recommended_events(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Événements à venir recommandés à l'utilisateur connecté"""
+    # Import différé : NumPy et SciPy ne sont chargés qu'au premier appel, pas au démarrage
+    from app.utils.recommendations import recommend_events
+    recommended = recommend_events(db, current_user.id, limit)
+    return [{**event.__dict__, "score": score} for event, score in recommended]
+
+@router.get("/batch", response_model=BatchResult[EventSchema])
+def get_events_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    """Récupérer plusieurs événements par leurs IDs"""
+    return fetch_by_ids(db, Event, ids)
 
 @router.get("/{event_id}", response_model=EventSchema)
-def get_event(event_id: int, db: Session = Depends(get_db)):
+def get_event(event_id: int, db: Session = Depends(get_read_db)):
     """Récupérer un événement par son ID"""
     event = db.query(Event).filter(Event.id == event_id).first()
     if event is None:
@@ -53,10 +193,23 @@ def get_event(event_id: int, db: Session = Depends(get_db)):
     return event
 
 @router.get("/upcoming/", response_model=List[EventSchema])
-def get_upcoming_events(db: Session = Depends(get_db)):
-    """Récupérer les événements à venir"""
+def get_upcoming_events(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Récupérer les événements à venir (page suivante via l'en-tête X-Next-Cursor)"""
     today = date.today()
-    events = db.query(Event).filter(Event.date_start >= today).order_by(Event.date_start).all()
+    query = db.query(Event).filter(Event.date_start >= today)
+    if cursor:
+        last = decode_cursor(cursor, date_start=date.fromisoformat, id=int)
+        query = query.filter(tuple_(Event.date_start, Event.id) > tuple_(last["date_start"], last["id"]))
+
+    events = query.order_by(Event.date_start, Event.id).limit(limit + 1).all()
+    if len(events) > limit:
+        events = events[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor({"date_start": events[-1].date_start, "id": events[-1].id})
     return events
 
 @router.put("/{event_id}", response_model=EventSchema)
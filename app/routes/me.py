@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Request
+
+from app.models.user import User
+from app.schemas import Dashboard
+from app.utils.auth import get_current_user
+from app.utils.dashboard import get_dashboard
+from app.utils.read_your_writes import wrote_recently
+from app.utils.negotiation import NegotiatedRoute
+
+router = APIRouter(prefix="/me", tags=["me"], route_class=NegotiatedRoute)
+
+@router.get("/dashboard", response_model=Dashboard)
+async def get_my_dashboard(request: Request, current_user: User = Depends(get_current_user)):
+    """Tableau de bord de l'utilisateur connecté : profil, présences, événements et mentorat"""
+    return await get_dashboard(current_user, read_primary=wrote_recently(request))
@@ -1,13 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Union
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.mentoring import Mentoring
 from app.models.user import User
-from app.schemas import MentoringCreate, MentoringUpdate, Mentoring as MentoringSchema, MentoringWithUsers
+from app.schemas import (
+    MentoringCreate,
+    MentoringUpdate,
+    Mentoring as MentoringSchema,
+    MentoringWithUsers,
+    MentoringChain,
+    MentoringLoadDistribution,
+    MentoringCycles,
+    MatchingRequest,
+    MatchingResult,
+    BatchResult,
+    SyncPage
+)
+from app.utils.auth import require_admin
+from app.utils.batch import batch_ids, fetch_by_ids
+from app.utils.delta_sync import DeltaSync, delta_sync
+from app.utils.fields import FieldSelection, field_selection
+from app.utils import mentoring_graph as graph
+from app.utils.mentoring_graph import (
+    ChainDirection,
+    mentoring_graph,
+    MENTORING_GRAPH_INDEX,
+    MENTORING_GRAPH_MAX_DEPTH
+)
+from app.utils.negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/mentoring", tags=["mentoring"])
+router = APIRouter(prefix="/mentoring", tags=["mentoring"], route_class=NegotiatedRoute)
 
 @router.post("/", response_model=MentoringSchema, status_code=status.HTTP_201_CREATED)
 def create_mentoring(mentoring: MentoringCreate, db: Session = Depends(get_db)):
@@ -52,14 +76,85 @@ def create_mentoring(mentoring: MentoringCreate, db: Session = Depends(get_db)):
     db.refresh(db_mentoring)
     return db_mentoring
 
-@router.get("/", response_model=List[MentoringWithUsers])
-def get_mentoring(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Récupérer toutes les relations de mentorat"""
-    mentoring = db.query(Mentoring).offset(skip).limit(limit).all()
-    return mentoring
+@router.post("/match", response_model=MatchingResult)
+def match_mentoring(
+    request: MatchingRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Attribuer automatiquement des mentors aux étudiants d'un niveau sur un sujet"""
+    # Import différé : NumPy et SciPy ne sont chargés qu'au premier appel, pas au démarrage
+    from app.utils.matching import match_mentors
+    return match_mentors(
+        db,
+        request.subject,
+        request.mentee_level,
+        request.mentor_levels,
+        request.capacity,
+        request.capacities,
+        request.dry_run
+    )
+
+@router.get("/", response_model=Union[List[MentoringWithUsers], SyncPage[MentoringWithUsers]])
+def get_mentoring(
+    skip: int = 0,
+    limit: int = 100,
+    selection: FieldSelection = Depends(field_selection(Mentoring, MentoringWithUsers)),
+    sync: DeltaSync = Depends(delta_sync(Mentoring)),
+    db: Session = Depends(get_read_db)
+):
+    """Récupérer toutes les relations de mentorat (ou celles modifiées depuis updated_since)"""
+    mentoring = sync.fetch(db, db.query(Mentoring).options(*selection.options()), skip, limit)
+    return sync.render(db, selection, mentoring)
+
+@router.get("/batch", response_model=BatchResult[MentoringWithUsers])
+def get_mentoring_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    """Récupérer plusieurs relations de mentorat par leurs IDs"""
+    # Mentor et parrainé chargés dans la même requête
+    return fetch_by_ids(db, Mentoring, ids, joinedload(Mentoring.mentor), joinedload(Mentoring.sponsored))
+
+@router.get("/graph/user/{user_id}/chain", response_model=MentoringChain)
+def get_mentoring_chain(
+    user_id: int,
+    direction: ChainDirection = ChainDirection.descendants,
+    depth: int = Query(3, ge=1, le=MENTORING_GRAPH_MAX_DEPTH),
+    db: Session = Depends(get_read_db)
+):
+    """Chaîne de mentorat d'un utilisateur : ses mentors successifs ou ses parrainés successifs"""
+    if not db.query(User.id).filter(User.id == user_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Utilisateur non trouvé"
+        )
+
+    if MENTORING_GRAPH_INDEX:
+        nodes = mentoring_graph.chain(user_id, direction, depth)
+    else:
+        nodes = graph.chain(db, user_id, direction, depth)
+    return {"user_id": user_id, "direction": direction.value, "depth": depth, "nodes": nodes}
+
+@router.get("/graph/load", response_model=MentoringLoadDistribution)
+def get_mentor_load(db: Session = Depends(get_read_db)):
+    """Répartition du nombre de parrainés par mentor"""
+    if MENTORING_GRAPH_INDEX:
+        return mentoring_graph.load_distribution()
+    return graph.load_distribution(db)
+
+@router.get("/graph/cycles", response_model=MentoringCycles)
+def get_mentoring_cycles(
+    max_length: int = Query(6, ge=2, le=MENTORING_GRAPH_MAX_DEPTH),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """Détecter les cycles de mentorat (A mentore B, qui mentore ... A)"""
+    if MENTORING_GRAPH_INDEX:
+        cycles, truncated = mentoring_graph.find_cycles(max_length, limit)
+    else:
+        cycles, truncated = graph.find_cycles(db, max_length, limit)
+    return {"cycles": cycles, "truncated": truncated}
 
 @router.get("/{mentoring_id}", response_model=MentoringWithUsers)
-def get_mentoring_by_id(mentoring_id: int, db: Session = Depends(get_db)):
+def get_mentoring_by_id(mentoring_id: int, db: Session = Depends(get_read_db)):
     """Récupérer une relation de mentorat par son ID"""
     mentoring = db.query(Mentoring).filter(Mentoring.id == mentoring_id).first()
     if mentoring is None:
@@ -70,7 +165,7 @@ def get_mentoring_by_id(mentoring_id: int, db: Session = Depends(get_db)):
     return mentoring
 
 @router.get("/user/{user_id}/mentoring", response_model=List[MentoringWithUsers])
-def get_user_mentoring(user_id: int, db: Session = Depends(get_db)):
+def get_user_mentoring(user_id: int, db: Session = Depends(get_read_db)):
     """Récupérer tous les étudiants qu'un utilisateur mentore"""
     # Vérifier que l'utilisateur existe
     user = db.query(User).filter(User.id == user_id).first()
@@ -80,11 +175,14 @@ def get_user_mentoring(user_id: int, db: Session = Depends(get_db)):
             detail="Utilisateur non trouvé"
         )
     
-    mentoring = db.query(Mentoring).filter(Mentoring.mentor_id == user_id).all()
+    mentoring = db.query(Mentoring).options(
+        joinedload(Mentoring.mentor),
+        joinedload(Mentoring.sponsored)
+    ).filter(Mentoring.mentor_id == user_id).all()
     return mentoring
 
 @router.get("/user/{user_id}/sponsored", response_model=List[MentoringWithUsers])
-def get_user_sponsored(user_id: int, db: Session = Depends(get_db)):
+def get_user_sponsored(user_id: int, db: Session = Depends(get_read_db)):
     """Récupérer tous les mentors d'un utilisateur"""
     # Vérifier que l'utilisateur existe
     user = db.query(User).filter(User.id == user_id).first()
@@ -94,7 +192,10 @@ def get_user_sponsored(user_id: int, db: Session = Depends(get_db)):
             detail="Utilisateur non trouvé"
         )
     
-    mentoring = db.query(Mentoring).filter(Mentoring.sponsored_id == user_id).all()
+    mentoring = db.query(Mentoring).options(
+        joinedload(Mentoring.mentor),
+        joinedload(Mentoring.sponsored)
+    ).filter(Mentoring.sponsored_id == user_id).all()
     return mentoring
 
 @router.put("/{mentoring_id}", response_model=MentoringSchema)
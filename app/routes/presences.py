@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, extract, Integer
 from typing import List, Dict, Any
 from datetime import datetime, date, timedelta
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.presence import Presence
 from app.models.classroom import Classroom
 from app.models.user import User
-from app.schemas import PresenceCreate, PresenceUpdate, Presence as PresenceSchema, PresenceWithDetails
+from app.schemas import PresenceCreate, PresenceUpdate, Presence as PresenceSchema, PresenceWithDetails, BatchResult
 from app.utils.auth import get_current_user
+from app.utils.batch import batch_ids, fetch_by_ids
+from app.utils.fields import FieldSelection, field_selection
+from app.utils.group_commit import (
+    PRESENCE_GROUP_COMMIT,
+    DuplicatePresenceError,
+    GroupCommitTimeout,
+    presence_batcher
+)
+from app.utils.materialized_views import classroom_daily_affluence, view_freshness
+from app.utils.singleflight import coalesce
+from app.utils.negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/presences", tags=["presences"])
+router = APIRouter(prefix="/presences", tags=["presences"], route_class=NegotiatedRoute)
+
+# Période maximale des analyses calculées sur la table des présences
+ANALYTICS_MAX_DAYS = 366
 
 @router.post("/", response_model=PresenceSchema, status_code=status.HTTP_201_CREATED)
 def create_presence(presence: PresenceCreate, db: Session = Depends(get_db)):
@@ -46,6 +60,38 @@ def create_presence(presence: PresenceCreate, db: Session = Depends(get_db)):
             detail="Une présence existe déjà pour cet utilisateur dans cette salle aujourd'hui"
         )
     
+    # Mode groupé : la présence est insérée avec les autres présences du lot
+    if PRESENCE_GROUP_COMMIT:
+        row = {
+            "presence": presence.presence,
+            "classroom_id": presence.classroom_id,
+            "user_id": user.id
+        }
+        # Connexion rendue au pool pendant l'attente : le thread d'écriture doit pouvoir en obtenir une
+        db.close()
+        future = presence_batcher.submit(row)
+        try:
+            return presence_batcher.wait(future)
+        except DuplicatePresenceError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Une présence existe déjà pour cet utilisateur dans cette salle aujourd'hui"
+            )
+        except GroupCommitTimeout as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Présence non enregistrée, réessayez" if exc.abandoned
+                else "Enregistrement de la présence non confirmé, réessayez (un doublon sera refusé)",
+                headers={"Retry-After": "1"}
+            )
+        except Exception:
+            # Échec du lot entier (déjà journalisé par le thread d'écriture)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="L'enregistrement du lot de présences a échoué, réessayez",
+                headers={"Retry-After": "1"}
+            )
+    
     # Créer la présence avec le user_id trouvé
     db_presence = Presence(
         presence=presence.presence,
@@ -64,10 +110,11 @@ def get_presences(
     classroom_id: int = None,
     user_id: int = None,
     date_filter: date = None,
-    db: Session = Depends(get_db)
+    selection: FieldSelection = Depends(field_selection(Presence, PresenceWithDetails)),
+    db: Session = Depends(get_read_db)
 ):
     """Récupérer les présences avec filtres"""
-    query = db.query(Presence)
+    query = db.query(Presence).options(*selection.options())
     
     if classroom_id:
         query = query.filter(Presence.classroom_id == classroom_id)
@@ -79,10 +126,16 @@ def get_presences(
         query = query.filter(func.date(Presence.timestamp) == date_filter)
     
     presences = query.offset(skip).limit(limit).all()
-    return presences
+    return selection.render(presences)
+
+@router.get("/batch", response_model=BatchResult[PresenceWithDetails])
+def get_presences_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    """Récupérer plusieurs présences par leurs IDs"""
+    # Salle et utilisateur chargés dans la même requête
+    return fetch_by_ids(db, Presence, ids, joinedload(Presence.classroom), joinedload(Presence.user))
 
 @router.get("/{presence_id}", response_model=PresenceWithDetails)
-def get_presence(presence_id: int, db: Session = Depends(get_db)):
+def get_presence(presence_id: int, db: Session = Depends(get_read_db)):
     """Récupérer une présence par son ID"""
     presence = db.query(Presence).filter(Presence.id == presence_id).first()
     if presence is None:
@@ -93,7 +146,7 @@ def get_presence(presence_id: int, db: Session = Depends(get_db)):
     return presence
 
 @router.get("/classroom/{classroom_id}/occupancy", response_model=dict)
-def get_classroom_occupancy(classroom_id: int, date_filter: date = None, db: Session = Depends(get_db)):
+def get_classroom_occupancy(classroom_id: int, date_filter: date = None, db: Session = Depends(get_read_db)):
     """Obtenir l'occupation d'une salle de classe"""
     # Vérifier que la salle existe
     classroom = db.query(Classroom).filter(Classroom.id == classroom_id).first()
@@ -130,7 +183,7 @@ def get_classroom_occupancy(classroom_id: int, date_filter: date = None, db: Ses
     }
 
 @router.get("/user/{user_id}/history", response_model=List[PresenceWithDetails])
-def get_user_presence_history(user_id: int, db: Session = Depends(get_db)):
+def get_user_presence_history(user_id: int, db: Session = Depends(get_read_db)):
     """Obtenir l'historique des présences d'un utilisateur"""
     # Vérifier que l'utilisateur existe
     user = db.query(User).filter(User.id == user_id).first()
@@ -196,10 +249,11 @@ def delete_presence(presence_id: int, db: Session = Depends(get_db)):
 # ===== ENDPOINTS POUR L'ANALYSE D'AFFLUENCE =====
 
 @router.get("/analytics/overview", response_model=Dict[str, Any])
+@coalesce()
 def get_affluence_overview(
     start_date: date = None,
     end_date: date = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Vue d'ensemble de l'affluence sur une période"""
     if not start_date:
@@ -207,35 +261,36 @@ def get_affluence_overview(
     if not end_date:
         end_date = date.today()
     
-    # Statistiques globales
-    total_presences = db.query(Presence).filter(
-        func.date(Presence.timestamp).between(start_date, end_date),
-        Presence.presence == True
-    ).count()
+    # Les agrégats sont lus dans la vue matérialisée classroom_daily_affluence
+    affluence = classroom_daily_affluence.c
+    in_period = affluence.day.between(start_date, end_date)
     
-    total_absences = db.query(Presence).filter(
-        func.date(Presence.timestamp).between(start_date, end_date),
-        Presence.presence == False
-    ).count()
+    # Statistiques globales
+    totals = db.query(
+        func.coalesce(func.sum(affluence.presence_count), 0).label('presences'),
+        func.coalesce(func.sum(affluence.absence_count), 0).label('absences')
+    ).filter(in_period).one()
+    total_presences = int(totals.presences)
+    total_absences = int(totals.absences)
     
     # Affluence par jour
     daily_affluence = db.query(
-        func.date(Presence.timestamp).label('date'),
-        func.count(Presence.id).label('count')
-    ).filter(
-        func.date(Presence.timestamp).between(start_date, end_date),
-        Presence.presence == True
-    ).group_by(func.date(Presence.timestamp)).order_by(func.date(Presence.timestamp)).all()
+        affluence.day.label('date'),
+        func.sum(affluence.presence_count).cast(Integer).label('count')
+    ).filter(in_period).group_by(affluence.day).having(
+        func.sum(affluence.presence_count) > 0
+    ).order_by(affluence.day).all()
     
     # Affluence par salle
     classroom_affluence = db.query(
-        Classroom.name.label('classroom_name'),
-        Classroom.capacity.label('capacity'),
-        func.count(Presence.id).label('presence_count')
-    ).join(Presence, Classroom.id == Presence.classroom_id).filter(
-        func.date(Presence.timestamp).between(start_date, end_date),
-        Presence.presence == True
-    ).group_by(Classroom.id, Classroom.name, Classroom.capacity).order_by(func.count(Presence.id).desc()).all()
+        affluence.classroom_name.label('classroom_name'),
+        affluence.capacity.label('capacity'),
+        func.sum(affluence.presence_count).cast(Integer).label('presence_count')
+    ).filter(in_period).group_by(
+        affluence.classroom_id, affluence.classroom_name, affluence.capacity
+    ).having(
+        func.sum(affluence.presence_count) > 0
+    ).order_by(func.sum(affluence.presence_count).desc()).all()
     
     return {
         "period": {
@@ -259,16 +314,20 @@ def get_affluence_overview(
                 "occupancy_percentage": round((room.presence_count / room.capacity) * 100, 2) if room.capacity > 0 else 0
             }
             for room in classroom_affluence
-        ]
+        ],
+        **view_freshness(db, "classroom_daily_affluence")
     }
 
 @router.get("/analytics/classroom/{classroom_id}/trends", response_model=Dict[str, Any])
+@coalesce()
 def get_classroom_affluence_trends(
     classroom_id: int,
-    days: int = 30,
-    db: Session = Depends(get_db)
+    days: int = Query(30, ge=1),
+    db: Session = Depends(get_read_db)
 ):
     """Tendances d'affluence pour une salle spécifique"""
+    # Période ramenée au maximum plutôt que refusée ; la réponse indique la période réellement analysée
+    days = min(days, ANALYTICS_MAX_DAYS)
     # Vérifier que la salle existe
     classroom = db.query(Classroom).filter(Classroom.id == classroom_id).first()
     if not classroom:
@@ -326,7 +385,8 @@ def get_classroom_affluence_trends(
     }
 
 @router.get("/analytics/real-time", response_model=Dict[str, Any])
-def get_real_time_affluence(db: Session = Depends(get_db)):
+@coalesce()
+def get_real_time_affluence(db: Session = Depends(get_read_db)):
     """Affluence en temps réel (aujourd'hui)"""
     today = date.today()
     
@@ -377,12 +437,14 @@ def get_real_time_affluence(db: Session = Depends(get_db)):
     }
 
 @router.get("/analytics/peak-times", response_model=Dict[str, Any])
+@coalesce()
 def get_peak_times(
     classroom_id: int = None,
-    days: int = 30,
-    db: Session = Depends(get_db)
+    days: int = Query(30, ge=1),
+    db: Session = Depends(get_read_db)
 ):
     """Analyser les heures de pointe"""
+    days = min(days, ANALYTICS_MAX_DAYS)
     end_date = date.today()
     start_date = end_date - timedelta(days=days)
     
@@ -415,4 +477,76 @@ def get_peak_times(
         "classroom_id": classroom_id,
         "peak_hours": peak_hours,
         "busiest_hour": max(peak_hours, key=lambda x: x['count']) if peak_hours else None
-    } 
\ No newline at end of file
+    }
+
+@router.get("/analytics/heatmap", response_model=Dict[str, Any])
+@coalesce()
+def get_occupancy_heatmap(
+    start_date: date = None,
+    end_date: date = None,
+    db: Session = Depends(get_read_db)
+):
+    """Matrice d'occupation salle × jour de la semaine × heure"""
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La date de début doit être avant la date de fin"
+        )
+    start_date = max(start_date, end_date - timedelta(days=ANALYTICS_MAX_DAYS))
+    
+    # Une seule requête agrégée ; la jointure externe conserve les salles vides
+    weekday = extract('dow', Presence.timestamp)
+    hour = extract('hour', Presence.timestamp)
+    rows = db.query(
+        Classroom.id,
+        Classroom.name,
+        Classroom.capacity,
+        weekday.label('weekday'),
+        hour.label('hour'),
+        func.count(Presence.id).label('count')
+    ).outerjoin(Presence, (Classroom.id == Presence.classroom_id) &
+                func.date(Presence.timestamp).between(start_date, end_date) &
+                (Presence.presence == True)
+    ).group_by(Classroom.id, Classroom.name, Classroom.capacity, weekday, hour).all()
+    
+    # Import différé : NumPy n'est chargé qu'au premier appel, pas au démarrage
+    from app.utils.analytics import build_occupancy_heatmap
+    heatmap = build_occupancy_heatmap(rows, start_date, end_date)
+    
+    return {
+        "period": {
+            "start_date": start_date,
+            "end_date": end_date
+        },
+        "dimensions": ["classroom", "weekday", "hour"],
+        "weekdays": ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"],
+        **heatmap
+    }
+
+@router.get("/analytics/forecast", response_model=Dict[str, Any])
+@coalesce()
+def get_occupancy_forecast(
+    classroom_id: int = None,
+    days: int = 7,
+    db: Session = Depends(get_read_db)
+):
+    """Prévision d'occupation horaire par salle pour les prochains jours"""
+    # Horizon ramené à 1..28 jours plutôt que refusé ; la réponse indique l'horizon retenu
+    days = min(max(days, 1), 28)
+    
+    # Import différé : NumPy n'est chargé qu'au premier appel, pas au démarrage
+    from app.utils.forecast import get_forecast
+    forecast = get_forecast(db, date.today(), days, classroom_id)
+    
+    return {
+        "period": {
+            "start_date": date.today(),
+            "days": days
+        },
+        "classroom_id": classroom_id,
+        **forecast
+    }
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Union
+from app.database import get_db, get_read_db
 from app.models.user import User
-from app.schemas import UserCreate, UserUpdate, User as UserSchema, UserResponse
+from app.schemas import UserCreate, UserUpdate, User as UserSchema, UserResponse, UserSuggestion, BatchResult, SyncPage
 from app.utils.auth import get_current_user, get_password_hash
+from app.utils.batch import batch_ids, fetch_by_ids
+from app.utils.delta_sync import DeltaSync, delta_sync
+from app.utils.fields import FieldSelection, field_selection
+from app.utils.user_index import user_index, USER_SEARCH_INDEX, USER_SEARCH_MAX_RESULTS
+from app.utils.negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=NegotiatedRoute)
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
@@ -32,14 +38,56 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.refresh(db_user)
     return db_user
 
-@router.get("/", response_model=List[UserResponse])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Récupérer tous les utilisateurs"""
-    users = db.query(User).offset(skip).limit(limit).all()
+@router.get("/", response_model=Union[List[UserResponse], SyncPage[UserResponse]])
+def get_users(
+    skip: int = 0,
+    limit: int = 100,
+    selection: FieldSelection = Depends(field_selection(User, UserResponse)),
+    sync: DeltaSync = Depends(delta_sync(User)),
+    db: Session = Depends(get_read_db)
+):
+    """Récupérer tous les utilisateurs (ou ceux modifiés depuis updated_since)"""
+    users = sync.fetch(db, db.query(User).options(*selection.options()), skip, limit)
+    return sync.render(db, selection, users)
+
+@router.get("/search", response_model=List[UserSuggestion])
+def search_users(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=USER_SEARCH_MAX_RESULTS),
+    db: Session = Depends(get_read_db)
+):
+    """Rechercher des utilisateurs par début de nom, d'email ou de nom de famille"""
+    if USER_SEARCH_INDEX:
+        return user_index.search(q, limit)
+
+    prefix = q.strip().lower()
+    name = func.lower(User.name).collate("C")
+    email = func.lower(User.email).collate("C")
+    # Par ordre de pertinence : début du nom, de l'email, puis d'un autre mot du nom.
+    # Chaque requête est servie par un index (collation "C", trigrammes) et limitée
+    # aux résultats manquants : les suivantes ne sont exécutées que si nécessaire.
+    conditions = [
+        (name.startswith(prefix, autoescape=True), name),
+        (email.startswith(prefix, autoescape=True), email),
+        (func.lower(User.name).contains(" " + prefix, autoescape=True), name),
+    ]
+    users = []
+    for condition, key in conditions:
+        query = db.query(User.id, User.name, User.email, User.level).filter(condition)
+        if users:
+            query = query.filter(User.id.notin_([user.id for user in users]))
+        users.extend(query.order_by(key, User.id).limit(limit - len(users)).all())
+        if len(users) >= limit:
+            break
     return users
 
+@router.get("/batch", response_model=BatchResult[UserResponse])
+def get_users_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    """Récupérer plusieurs utilisateurs par leurs IDs"""
+    return fetch_by_ids(db, User, ids)
+
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_read_db)):
     """Récupérer un utilisateur par son ID"""
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
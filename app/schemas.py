@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field, conint, field_validator
+from typing import Any, Dict, Generic, Optional, List, TypeVar
 from datetime import date, datetime
 
 # Schemas pour User
@@ -8,15 +8,27 @@ class UserBase(BaseModel):
     email: str
     level: str
 
+# Niveau donnant accès aux routes d'administration : attribué en base, jamais par l'API
+ADMIN_LEVEL = "admin"
+
+def check_client_level(level: Optional[str]) -> Optional[str]:
+    if level is not None and level.strip().lower() == ADMIN_LEVEL:
+        raise ValueError(f"Le niveau « {ADMIN_LEVEL} » ne peut pas être attribué par l'API")
+    return level
+
 class UserCreate(UserBase):
     password: str
 
+    _check_level = field_validator("level")(check_client_level)
+
 class UserUpdate(BaseModel):
     name: Optional[str] = None
     email: Optional[str] = None
     password: Optional[str] = None
     level: Optional[str] = None
 
+    _check_level = field_validator("level")(check_client_level)
+
 class User(UserBase):
     id: int
     created_at: datetime
@@ -25,6 +37,10 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class UserSuggestion(UserBase):
+    """Résultat compact de la recherche d'utilisateurs (typeahead)"""
+    id: int
+
 # Schemas pour Event
 class EventBase(BaseModel):
     title: str
@@ -57,6 +73,34 @@ class Event(EventBase):
     class Config:
         from_attributes = True
 
+class EventSearchResult(Event):
+    score: float
+
+class EventRecommendation(Event):
+    score: float
+
+class EventSearchPage(BaseModel):
+    items: List[EventSearchResult]
+    next_cursor: Optional[str] = None
+
+class CalendarEvent(BaseModel):
+    id: int
+    title: str
+    category: str
+    place: str
+    date_start: date
+    date_end: date
+
+class CalendarDay(BaseModel):
+    date: date
+    total: int
+    events: List[CalendarEvent] = []
+
+class EventCalendar(BaseModel):
+    date_from: date
+    date_to: date
+    days: List[CalendarDay]
+
 # Schemas pour Mentoring
 class MentoringBase(BaseModel):
     mentor_id: int
@@ -86,6 +130,65 @@ class MentoringWithUsers(Mentoring):
     mentor: User
     sponsored: User
 
+# Schemas pour le graphe de mentorat
+class MentoringChainNode(BaseModel):
+    id: int
+    name: str
+    level: str
+    depth: int
+    via_id: int  # Utilisateur par lequel ce nœud est atteint
+
+class MentoringChain(BaseModel):
+    user_id: int
+    direction: str
+    depth: int
+    nodes: List[MentoringChainNode]
+
+class MentorLoadBucket(BaseModel):
+    mentees: int
+    mentors: int
+
+class MentorLoad(BaseModel):
+    id: int
+    name: str
+    mentees: int
+
+class MentoringLoadDistribution(BaseModel):
+    mentors: int
+    pairs: int
+    max_mentees: int
+    average_mentees: float
+    distribution: List[MentorLoadBucket]
+    top_mentors: List[MentorLoad]
+
+class MentoringCycles(BaseModel):
+    cycles: List[List[int]]
+    truncated: bool
+
+class MatchingRequest(BaseModel):
+    subject: str = Field(..., min_length=1, max_length=200)
+    mentee_level: str
+    mentor_levels: List[str] = Field(..., min_length=1)  # Par ordre de préférence
+    capacity: int = Field(3, ge=1, le=50)  # Parrainés au plus par mentor (mentorats existants compris)
+    # Capacités particulières par identifiant de mentor, mêmes bornes que capacity (0 : aucun nouveau parrainé)
+    capacities: Dict[int, conint(ge=0, le=50)] = {}
+    dry_run: bool = False
+
+class MatchingPair(BaseModel):
+    mentor_id: int
+    sponsored_id: int
+    cost: float
+
+class MatchingResult(BaseModel):
+    subject: str
+    mentees: int
+    mentors: int
+    slots: int
+    pairs: List[MatchingPair]
+    unmatched: List[int]
+    dry_run: bool
+    elapsed_ms: float
+
 # Schemas pour Classroom
 class ClassroomBase(BaseModel):
     name: str
@@ -182,4 +285,54 @@ class EventParticipationWithDetails(EventParticipation):
 
 class EventWithParticipations(Event):
     participations: List[EventParticipation] = []
-    participant_count: int = 0 
\ No newline at end of file
+    participant_count: int = 0
+
+# Schema pour les lectures groupées par identifiants
+T = TypeVar("T")
+
+class BatchResult(BaseModel, Generic[T]):
+    items: List[T]
+    missing: List[int] = []
+
+# Schema pour la synchronisation incrémentale des listes (?updated_since=)
+class SyncPage(BaseModel, Generic[T]):
+    items: List[T]
+    deleted: List[int]  # identifiants supprimés depuis updated_since
+    watermark: str  # à renvoyer dans updated_since au prochain appel
+    has_more: bool
+
+# Schemas pour le tableau de bord de l'utilisateur connecté
+class DashboardPresence(Presence):
+    classroom: Classroom
+
+class DashboardEvent(Event):
+    participant_count: int = 0
+
+class DashboardSection(BaseModel, Generic[T]):
+    items: List[T]
+    total: int  # Nombre total d'éléments, la liste étant plafonnée
+
+class Dashboard(BaseModel):
+    user: UserResponse
+    presences: DashboardSection[DashboardPresence]
+    events: DashboardSection[DashboardEvent]
+    mentoring: DashboardSection[MentoringWithUsers]
+    sponsored: DashboardSection[MentoringWithUsers]
+    generated_at: datetime
+
+# Schemas pour le journal des modifications
+class ChangeRecord(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    operation: str  # insert, update, delete
+    payload: Optional[Dict[str, Any]] = None  # ligne après écriture, absente pour une suppression
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChangeFeed(BaseModel):
+    items: List[ChangeRecord]
+    next_cursor: Optional[str] = None  # à renvoyer dans since, même si la page est vide
+    has_more: bool
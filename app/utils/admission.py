@@ -0,0 +1,186 @@
+"""
+Contrôle d'admission et délestage par classe de routes
+
+Chaque requête est rangée dans une classe : ``critical`` (badgeage
+``POST /presences/`` et ``/health``), ``analytics`` (préfixes de
+``ADMISSION_ANALYTICS_PATHS``), ``write`` (autres méthodes d'écriture) ou
+``read``. Les classes ``write``, ``read`` et ``analytics`` ont chacune un
+nombre maximal de requêtes traitées simultanément (``ADMISSION_*_CONCURRENCY``,
+0 pour ne pas limiter) ; au-delà, la requête attend son tour dans une file
+bornée (``ADMISSION_MAX_QUEUE``) au plus ``ADMISSION_MAX_WAIT_SECONDS``
+secondes, puis reçoit 503 avec ``Retry-After``.
+
+Les requêtes critiques et les requêtes ``OPTIONS`` (préflights CORS) ne sont
+jamais mises en attente. Les analyses passent après le reste : tant que des
+écritures attendent leur tour, elles sont refusées immédiatement. Les budgets
+s'entendent par processus.
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.negotiation import transcode
+
+ADMISSION_WRITE_CONCURRENCY = int(os.getenv("ADMISSION_WRITE_CONCURRENCY", "24"))
+ADMISSION_READ_CONCURRENCY = int(os.getenv("ADMISSION_READ_CONCURRENCY", "16"))
+ADMISSION_ANALYTICS_CONCURRENCY = int(os.getenv("ADMISSION_ANALYTICS_CONCURRENCY", "4"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "2"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+ADMISSION_ANALYTICS_PATHS = [
+    path.strip() for path in os.getenv("ADMISSION_ANALYTICS_PATHS", "/presences/analytics/").split(",") if path.strip()
+]
+
+# Chemins prioritaires : (méthode, chemin exact)
+CRITICAL_ROUTES = {("POST", "/presences/"), ("GET", "/health"), ("HEAD", "/health")}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class RouteClass(str, Enum):
+    critical = "critical"
+    write = "write"
+    read = "read"
+    analytics = "analytics"
+
+
+def classify(method: str, path: str, analytics_paths: Tuple[str, ...] = tuple(ADMISSION_ANALYTICS_PATHS)) -> RouteClass:
+    """Classe de route d'une requête"""
+    if (method, path) in CRITICAL_ROUTES:
+        return RouteClass.critical
+    if path.startswith(analytics_paths):
+        return RouteClass.analytics
+    if method not in SAFE_METHODS:
+        return RouteClass.write
+    return RouteClass.read
+
+
+class ConcurrencyLimiter:
+    """Au plus ``limit`` requêtes en cours, les suivantes servies dans l'ordre d'arrivée"""
+
+    def __init__(self, limit: int, max_queue: int = ADMISSION_MAX_QUEUE):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def try_acquire(self) -> bool:
+        """Place libre immédiatement, sans attente"""
+        if self.limit <= 0:
+            self.active += 1
+            return True
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        return False
+
+    async def acquire(self, timeout: float) -> bool:
+        """Place obtenue dans le délai (False : file pleine ou délai dépassé)"""
+        if self.try_acquire():
+            return True
+        if len(self._waiters) >= self.max_queue or timeout <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Place attribuée au moment de l'expiration : rendue au suivant
+                self.release()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self) -> None:
+        """Libérer une place : transmise directement au premier en attente"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+def _shed(accept: str, retry_after: int) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    body = json.dumps({"detail": "Service surchargé, réessayez dans quelques instants"}, ensure_ascii=False).encode()
+    media_type = "application/json"
+    converted = transcode(body, media_type, accept)
+    if converted is not None:
+        body, media_type = converted
+    return 503, [
+        (b"content-type", media_type.encode()),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(retry_after).encode()),
+    ], body
+
+
+class AdmissionControlMiddleware:
+    """Limiter la concurrence par classe de routes et délester au-delà"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Optional[Dict[RouteClass, int]] = None,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_wait: float = ADMISSION_MAX_WAIT_SECONDS,
+        retry_after: int = ADMISSION_RETRY_AFTER_SECONDS,
+        analytics_paths=ADMISSION_ANALYTICS_PATHS
+    ):
+        self.app = app
+        if limits is None:
+            limits = {
+                RouteClass.write: ADMISSION_WRITE_CONCURRENCY,
+                RouteClass.read: ADMISSION_READ_CONCURRENCY,
+                RouteClass.analytics: ADMISSION_ANALYTICS_CONCURRENCY,
+            }
+        self.limiters = {route_class: ConcurrencyLimiter(limit, max_queue) for route_class, limit in limits.items()}
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.analytics_paths = tuple(analytics_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"], self.analytics_paths)
+        limiter = self.limiters.get(route_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if route_class == RouteClass.analytics:
+            # Pas d'attente pour les analyses quand les écritures sont déjà en file
+            writes = self.limiters.get(RouteClass.write)
+            admitted = (writes is None or not writes.waiting) and await limiter.acquire(self.max_wait)
+        else:
+            admitted = await limiter.acquire(self.max_wait)
+        if not admitted:
+            accept = dict(scope["headers"]).get(b"accept", b"").decode("latin-1")
+            status, headers, body = _shed(accept, self.retry_after)
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
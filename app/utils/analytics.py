@@ -0,0 +1,91 @@
+"""
+Calculs vectorisés pour les endpoints d'analyse d'affluence
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+WEEKDAYS = 7
+HOURS = 24
+
+
+def to_iso_weekday(dow: np.ndarray) -> np.ndarray:
+    """Convertir un jour de semaine SQL (0 = dimanche) en index 0 = lundi"""
+    return (dow + 6) % WEEKDAYS
+
+
+def weekday_of(days: np.ndarray) -> np.ndarray:
+    """Jour de la semaine (0 = lundi) d'un tableau ``datetime64[D]``"""
+    # Le 1er janvier 1970 était un jeudi (index 3)
+    return (days.astype(np.int64) + 3) % WEEKDAYS
+
+
+def weekday_occurrences(start_date: date, end_date: date) -> np.ndarray:
+    """Nombre d'occurrences de chaque jour de la semaine (0 = lundi) sur une période"""
+    days = np.arange(
+        np.datetime64(start_date, "D"),
+        np.datetime64(end_date, "D") + 1,
+        dtype="datetime64[D]"
+    )
+    return np.bincount(weekday_of(days), minlength=WEEKDAYS)
+
+
+def build_occupancy_heatmap(
+    rows: Sequence[Any],
+    start_date: date,
+    end_date: date
+) -> Dict[str, Any]:
+    """Construire la matrice salle × jour × heure à partir des lignes agrégées.
+
+    Chaque ligne contient ``id``, ``name``, ``capacity``, ``weekday`` (0 = dimanche),
+    ``hour`` et ``count``. Les salles sans présence ont ``weekday``/``hour`` à NULL.
+    """
+    if not rows:
+        return {"classrooms": [], "average_presences": [], "occupancy_percentage": []}
+
+    columns = list(zip(*[(row.id, row.capacity, row.weekday, row.hour, row.count) for row in rows]))
+    row_ids = np.asarray(columns[0], dtype=np.int64)
+    row_capacities = np.asarray(columns[1], dtype=np.float64)
+    weekdays = np.asarray([-1 if value is None else value for value in columns[2]], dtype=np.int64)
+    hours = np.asarray([-1 if value is None else value for value in columns[3]], dtype=np.int64)
+    counts = np.asarray(columns[4], dtype=np.float64)
+
+    classroom_ids, first_index, classroom_index = np.unique(row_ids, return_index=True, return_inverse=True)
+    capacities = row_capacities[first_index]
+
+    # Pivot : on ignore les lignes de salles sans présence (jointure externe)
+    has_data = (weekdays >= 0) & (hours >= 0)
+    totals = np.zeros((len(classroom_ids), WEEKDAYS, HOURS), dtype=np.float64)
+    np.add.at(
+        totals,
+        (classroom_index[has_data], to_iso_weekday(weekdays[has_data]), hours[has_data]),
+        counts[has_data]
+    )
+
+    # Normalisation : moyenne par occurrence du jour, puis rapport à la capacité
+    occurrences = weekday_occurrences(start_date, end_date).astype(np.float64)
+    averages = np.divide(
+        totals,
+        occurrences[np.newaxis, :, np.newaxis],
+        out=np.zeros_like(totals),
+        where=occurrences[np.newaxis, :, np.newaxis] > 0
+    )
+    occupancy = np.divide(
+        averages * 100,
+        capacities[:, np.newaxis, np.newaxis],
+        out=np.zeros_like(averages),
+        where=capacities[:, np.newaxis, np.newaxis] > 0
+    )
+
+    names: Dict[int, str] = {row.id: row.name for row in rows}
+    classrooms: List[Dict[str, Any]] = [
+        {"id": int(classroom_id), "name": names[int(classroom_id)], "capacity": int(capacity)}
+        for classroom_id, capacity in zip(classroom_ids, capacities)
+    ]
+    return {
+        "classrooms": classrooms,
+        "average_presences": np.round(averages, 2).tolist(),
+        "occupancy_percentage": np.round(occupancy, 2).tolist()
+    }
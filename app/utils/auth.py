@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.user import User
+from app.schemas import ADMIN_LEVEL
 
 # Configuration
 SECRET_KEY = "your-secret-key-here"  # À changer en production
@@ -79,4 +80,13 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         return None
     if not verify_password(password, user.password):
         return None
-    return user 
\ No newline at end of file
+    return user 
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Restreindre une route aux administrateurs"""
+    if current_user.level != ADMIN_LEVEL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès réservé aux administrateurs"
+        )
+    return current_user
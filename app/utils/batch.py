@@ -0,0 +1,54 @@
+"""
+Lecture groupée par identifiants (``GET /<ressource>/batch?ids=3,1,2``)
+
+Une seule requête ``WHERE id = ANY(:ids)`` remplace autant d'appels unitaires ;
+les résultats sont rendus dans l'ordre demandé et les identifiants introuvables
+sont listés dans ``missing``.
+"""
+
+import os
+from typing import Any, Dict, List
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Integer, any_, literal
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+# Nombre maximal d'identifiants par appel
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "100"))
+
+
+def batch_ids(ids: str = Query(..., description="Identifiants séparés par des virgules")) -> List[int]:
+    """Dépendance : identifiants demandés, sans doublons et dans l'ordre"""
+    try:
+        values = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Les identifiants doivent être des entiers séparés par des virgules"
+        )
+    values = list(dict.fromkeys(values))
+    if not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucun identifiant fourni"
+        )
+    if len(values) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{BATCH_MAX_IDS} identifiants maximum par requête"
+        )
+    return values
+
+
+def fetch_by_ids(db: Session, model: Any, ids: List[int], *options: Any) -> Dict[str, List[Any]]:
+    """Charger les lignes demandées en une requête, dans l'ordre demandé"""
+    # Un seul paramètre tableau : même plan de requête quel que soit le nombre d'identifiants
+    rows = db.query(model).options(*options).filter(
+        model.id == any_(literal(ids, ARRAY(Integer)))
+    ).all()
+    by_id = {row.id: row for row in rows}
+    return {
+        "items": [by_id[item_id] for item_id in ids if item_id in by_id],
+        "missing": [item_id for item_id in ids if item_id not in by_id]
+    }
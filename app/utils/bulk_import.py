@@ -0,0 +1,260 @@
+"""
+Import en masse (CSV) des utilisateurs, salles et événements
+
+Le fichier est lu en flux et traité par paquets de ``BULK_IMPORT_CHUNK_SIZE``
+lignes : validation avec les schémas Pydantic, hachage des mots de passe en
+parallèle, chargement par ``COPY`` dans une table temporaire puis fusion dans
+la table cible par un seul ``INSERT ... SELECT``. Chaque paquet est validé
+dans sa propre transaction ; une ligne invalide est signalée dans le rapport
+sans interrompre l'import.
+
+Ligne de commande : ``python -m app.utils.bulk_import users utilisateurs.csv``
+"""
+
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import String, text
+from sqlalchemy.orm import Session
+
+from app.models.classroom import Classroom
+from app.models.event import Event
+from app.models.user import User
+from app.schemas import ClassroomCreate, EventCreate, UserCreate
+from app.utils.auth import get_password_hash
+from app.utils.outbox import ChangeOperation, record_changes
+from app.utils.user_index import user_index
+
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "5000"))
+# bcrypt libère le GIL : des threads suffisent à occuper tous les cœurs
+BULK_IMPORT_HASH_WORKERS = int(os.getenv("BULK_IMPORT_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Nombre maximal d'erreurs détaillées dans le rapport
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+
+
+class ImportEntity(str, Enum):
+    users = "users"
+    classrooms = "classrooms"
+    events = "events"
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    model: Any
+    schema: Type[BaseModel]
+    # Colonne unique : les lignes en doublon sont rejetées au lieu de faire échouer le paquet
+    unique_column: Optional[str] = None
+    duplicate_message: str = ""
+    check: Optional[Callable[[BaseModel], Optional[str]]] = None
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.schema.model_fields)
+
+
+def _check_classroom(classroom: ClassroomCreate) -> Optional[str]:
+    if classroom.capacity <= 0:
+        return "La capacité doit être supérieure à 0"
+    return None
+
+
+def _check_event(event: EventCreate) -> Optional[str]:
+    if event.date_end < event.date_start:
+        return "La date de fin doit être après la date de début"
+    return None
+
+
+IMPORT_SPECS: Dict[ImportEntity, ImportSpec] = {
+    ImportEntity.users: ImportSpec(User, UserCreate, "email", "Email déjà enregistré"),
+    ImportEntity.classrooms: ImportSpec(Classroom, ClassroomCreate, check=_check_classroom),
+    ImportEntity.events: ImportSpec(Event, EventCreate, check=_check_event),
+}
+
+
+class ImportReport:
+    def __init__(self, entity: ImportEntity):
+        self.entity = entity
+        self.total_rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def reject(self, line: int, messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < BULK_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "errors": messages})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "entity": self.entity.value,
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _chunks(reader: Iterable[Dict[str, str]], size: int) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+    chunk: List[Tuple[int, Dict[str, str]]] = []
+    # La ligne 1 est l'en-tête
+    for line, row in enumerate(reader, start=2):
+        chunk.append((line, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validate(spec: ImportSpec, raw: Dict[str, str]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Valider une ligne ; retourne les valeurs prêtes à charger ou la liste des erreurs"""
+    data = {column: (raw.get(column) or None) for column in spec.columns}
+    try:
+        item = spec.schema.model_validate(data)
+    except ValidationError as exc:
+        return None, [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+
+    errors = []
+    values = item.model_dump()
+    for column in spec.columns:
+        column_type = spec.model.__table__.c[column].type
+        value = values[column]
+        if isinstance(value, str) and isinstance(column_type, String) and column_type.length and len(value) > column_type.length:
+            errors.append(f"{column}: {column_type.length} caractères maximum")
+    if spec.check is not None:
+        message = spec.check(item)
+        if message:
+            errors.append(message)
+    return (None, errors) if errors else (values, [])
+
+
+def _load_chunk(db: Session, spec: ImportSpec, rows: List[Tuple[int, Dict[str, Any]]]) -> List[int]:
+    """Charger un paquet validé par COPY puis le fusionner ; retourne les lignes rejetées comme doublons"""
+    staging = f"import_{spec.table}"
+    columns = ", ".join(spec.columns)
+    # Table temporaire aux types de la table cible (sans ses contraintes), supprimée au COMMIT
+    db.execute(text(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT 0 AS line, {columns} FROM {spec.table} WITH NO DATA"
+    ))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line, values in rows:
+        writer.writerow([line] + [values[column] for column in spec.columns])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {staging} (line, {columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+    if spec.unique_column is None:
+        inserted = db.execute(text(
+            f"INSERT INTO {spec.table} ({columns}) SELECT {columns} FROM {staging} ORDER BY line RETURNING id"
+        )).scalars().all()
+        record_changes(db.connection(), spec.model, ChangeOperation.insert, inserted)
+        return []
+
+    # Première occurrence de chaque clé dans le paquet, et uniquement si elle n'existe pas déjà
+    key = spec.unique_column
+    inserted = db.execute(text(
+        f"INSERT INTO {spec.table} ({columns}) "
+        f"SELECT DISTINCT ON ({key}) {columns} FROM {staging} ORDER BY {key}, line "
+        f"ON CONFLICT ({key}) DO NOTHING RETURNING id, {key}"
+    )).all()
+    # Chargement par COPY hors unité de travail ORM : les lignes sont ajoutées au journal ici
+    record_changes(db.connection(), spec.model, ChangeOperation.insert, [row[0] for row in inserted])
+    remaining = {row[1] for row in inserted}
+    duplicates = []
+    for line, values in rows:
+        if values[key] in remaining:
+            remaining.discard(values[key])
+        else:
+            duplicates.append(line)
+    return duplicates
+
+
+def import_csv(
+    db: Session,
+    entity: ImportEntity,
+    stream: TextIO,
+    chunk_size: int = BULK_IMPORT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """Importer un fichier CSV (avec en-tête) ; retourne le rapport d'import"""
+    spec = IMPORT_SPECS[entity]
+    reader = csv.DictReader(stream)
+    missing = [column for column in spec.columns if column not in (reader.fieldnames or [])
+               and spec.schema.model_fields[column].is_required()]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans l'en-tête : {', '.join(missing)}")
+
+    report = ImportReport(entity)
+    with ThreadPoolExecutor(max_workers=BULK_IMPORT_HASH_WORKERS) as executor:
+        for chunk in _chunks(reader, chunk_size):
+            report.total_rows += len(chunk)
+            valid: List[Tuple[int, Dict[str, Any]]] = []
+            for line, raw in chunk:
+                values, errors = _validate(spec, raw)
+                if errors:
+                    report.reject(line, errors)
+                else:
+                    valid.append((line, values))
+            if not valid:
+                continue
+
+            if entity is ImportEntity.users:
+                hashes = executor.map(get_password_hash, [values["password"] for _, values in valid])
+                for (_, values), hashed in zip(valid, hashes):
+                    values["password"] = hashed
+
+            try:
+                duplicates = _load_chunk(db, spec, valid)
+                db.commit()
+            except Exception as exc:
+                db.rollback()
+                for line, _ in valid:
+                    report.reject(line, [f"Échec du chargement du paquet : {str(getattr(exc, 'orig', exc)).splitlines()[0]}"])
+                continue
+
+            for line in duplicates:
+                report.reject(line, [spec.duplicate_message])
+            report.imported += len(valid) - len(duplicates)
+
+    # Le chargement par COPY contourne la session ORM : l'index de recherche est invalidé ici
+    if entity is ImportEntity.users and report.imported:
+        user_index.invalidate()
+
+    return report.as_dict()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Import en masse d'un fichier CSV")
+    parser.add_argument("entity", choices=[entity.value for entity in ImportEntity])
+    parser.add_argument("path", help="Fichier CSV avec en-tête")
+    parser.add_argument("--chunk-size", type=int, default=BULK_IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as csv_file:
+            result = import_csv(session, ImportEntity(args.entity), csv_file, args.chunk_size)
+    finally:
+        session.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
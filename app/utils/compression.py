@@ -0,0 +1,233 @@
+"""
+Compression des réponses (zstd, Brotli, gzip)
+
+L'encodage est choisi d'après ``Accept-Encoding`` (valeurs ``q`` comprises ; à
+égalité, zstd puis Brotli puis gzip). zstd et Brotli ne sont proposés que si les
+paquets optionnels ``zstandard`` et ``brotli`` sont installés.
+
+Ne sont pas compressés : les corps de moins de ``COMPRESSION_MIN_SIZE`` octets,
+les types non textuels, les réponses déjà encodées, les réponses envoyées en
+plusieurs morceaux (streaming), les chemins commençant par un préfixe de
+``COMPRESSION_EXCLUDED_PATHS`` et les routes marquées ``@no_compression``.
+
+Les réponses GET réussies passent par un cache LRU de corps compressés indexé
+par l'empreinte du corps et l'encodage (``COMPRESSION_CACHE_MAX_BYTES``, 0 pour
+le désactiver) : un même corps (liste inchangée, analyse mutualisée) n'est
+compressé qu'une fois par encodage.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_EXCLUDED_PATHS = [path.strip() for path in os.getenv("COMPRESSION_EXCLUDED_PATHS", "").split(",") if path.strip()]
+COMPRESSION_CACHE_MAX_BYTES = int(os.getenv("COMPRESSION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Niveaux adaptés à des réponses dynamiques (rapides, bon taux sur du JSON répétitif)
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+# Au-delà, la compression est faite hors de la boucle d'événements
+_THREADPOOL_MIN_SIZE = 256 * 1024
+
+_COMPRESSIBLE_TYPES = {"application/json", "application/msgpack", "application/javascript", "application/xml", "image/svg+xml"}
+# Statuts sans corps ou dont le corps ne doit pas être réencodé
+_SKIPPED_STATUSES = {204, 206, 304}
+
+
+def _gzip(body: bytes) -> bytes:
+    # mtime fixe : le même corps donne toujours les mêmes octets
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def _zstd(body: bytes) -> bytes:
+    # Un compresseur par appel : les instances ne sont pas partageables entre threads
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+
+# Par ordre de préférence à qualité égale
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd
+if brotli is not None:
+    ENCODERS["br"] = _brotli
+ENCODERS["gzip"] = _gzip
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Encodage préféré parmi ceux acceptés par le client (None : réponse non compressée)"""
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+    default = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODERS:
+        quality = qualities.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """Exclure une route de la compression (à placer sous le décorateur de route)"""
+    endpoint.no_compression = True
+    return endpoint
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+
+class CompressedBodyCache:
+    """Corps compressés récents, bornés en octets"""
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+            return compressed
+
+    def put(self, key: Tuple[str, bytes], compressed: bytes) -> None:
+        if len(compressed) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = compressed
+            self._size += len(compressed)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """Compresser les réponses selon ``Accept-Encoding``"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        excluded_paths=COMPRESSION_EXCLUDED_PATHS,
+        cache: Optional[CompressedBodyCache] = None
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_paths = tuple(excluded_paths)
+        if cache is None and COMPRESSION_CACHE_MAX_BYTES > 0:
+            cache = CompressedBodyCache()
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        decided = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, decided
+            if decided:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Envoyé avec le premier morceau du corps, une fois la décision prise
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            decided = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or start["status"] in _SKIPPED_STATUSES
+                or "content-encoding" in headers
+                or not _is_compressible(headers.get("content-type", ""))
+                # Route résolue par le routeur (scope partagé) : marquage @no_compression
+                or getattr(scope.get("endpoint"), "no_compression", False)
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            cacheable = scope["method"] == "GET" and start["status"] == 200 and "no-store" not in headers.get("cache-control", "")
+            compressed = await self._compress(encoding, body, cacheable)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Représentation différente du corps d'origine
+                headers["etag"] = f"W/{etag}"
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+        if start is not None and not decided:
+            # Réponse sans corps
+            await send(start)
+
+    async def _compress(self, encoding: str, body: bytes, cacheable: bool) -> bytes:
+        key = None
+        if cacheable and self.cache is not None:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                return compressed
+        encoder = ENCODERS[encoding]
+        if len(body) >= _THREADPOOL_MIN_SIZE:
+            compressed = await run_in_threadpool(encoder, body)
+        else:
+            compressed = encoder(body)
+        if key is not None:
+            self.cache.put(key, compressed)
+        return compressed
@@ -0,0 +1,226 @@
+"""
+Tableau de bord de l'utilisateur connecté (``GET /me/dashboard``)
+
+Réunit en une réponse le profil, les dernières présences, les événements
+suivis et les relations de mentorat. Chaque section est lue par une seule
+requête SQL (relations jointes, total obtenu par ``count(*) OVER ()``) et
+plafonnée à ``DASHBOARD_SECTION_LIMIT`` éléments ; les quatre requêtes sont
+exécutées en parallèle, chacune avec sa propre session.
+
+Le résultat est gardé en cache par utilisateur pendant
+``DASHBOARD_CACHE_TTL_SECONDS`` secondes et invalidé dès qu'une écriture
+validée dans ce processus touche cet utilisateur (présence, participation,
+mentorat, profil) ; une modification d'événement ou de salle vide tout le cache.
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session, aliased, joinedload, noload
+from starlette.concurrency import run_in_threadpool
+
+from app.database import ReadSessionLocal, SessionLocal
+from app.models.classroom import Classroom
+from app.models.event import Event
+from app.models.event_participation import EventParticipation
+from app.models.mentoring import Mentoring
+from app.models.presence import Presence
+from app.models.user import User
+from app.schemas import Dashboard
+from app.utils.materialized_views import event_attendance_summary
+
+DASHBOARD_SECTION_LIMIT = int(os.getenv("DASHBOARD_SECTION_LIMIT", "20"))
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "10000"))
+
+
+class DashboardCache:
+    def __init__(self, ttl: float = DASHBOARD_CACHE_TTL_SECONDS, max_entries: int = DASHBOARD_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[float, Dashboard]]" = OrderedDict()
+        # Une invalidation incrémente la génération : un calcul commencé avant n'est pas mis en cache
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dashboard]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, dashboard = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return dashboard
+
+    def generation(self, user_id: int) -> Tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def put(self, user_id: int, dashboard: Dashboard, generation: Tuple[int, int]) -> None:
+        with self._lock:
+            if generation != (self._epoch, self._generations.get(user_id, 0)):
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, dashboard)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+
+dashboard_cache = DashboardCache()
+
+
+def _recent_presences(db: Session, user_id: int) -> Dict[str, Any]:
+    rows = db.query(Presence, func.count().over()).options(
+        joinedload(Presence.classroom),
+        noload(Presence.user)
+    ).filter(
+        Presence.user_id == user_id
+    ).order_by(Presence.timestamp.desc(), Presence.id.desc()).limit(DASHBOARD_SECTION_LIMIT).all()
+    return {"items": [presence for presence, _ in rows], "total": rows[0][1] if rows else 0}
+
+
+def _attended_events(db: Session, user_id: int) -> Dict[str, Any]:
+    # Nombre de participants lu dans la vue matérialisée, compté directement
+    # pour les événements créés depuis son dernier rafraîchissement
+    counted = aliased(EventParticipation)
+    live_count = select(func.count(counted.id)).where(
+        counted.event_id == Event.id,
+        counted.is_attending == True
+    ).correlate(Event).scalar_subquery()
+    rows = db.query(
+        Event,
+        func.coalesce(event_attendance_summary.c.participant_count, live_count),
+        func.count().over()
+    ).join(
+        EventParticipation, Event.id == EventParticipation.event_id
+    ).outerjoin(
+        event_attendance_summary, event_attendance_summary.c.event_id == Event.id
+    ).filter(
+        EventParticipation.user_id == user_id,
+        EventParticipation.is_attending == True
+    ).order_by(Event.date_start.desc(), Event.id.desc()).limit(DASHBOARD_SECTION_LIMIT).all()
+    items = [{**event.__dict__, "participant_count": participant_count} for event, participant_count, _ in rows]
+    return {"items": items, "total": rows[0][2] if rows else 0}
+
+
+def _mentoring(column: Any) -> Callable[[Session, int], Dict[str, Any]]:
+    def section(db: Session, user_id: int) -> Dict[str, Any]:
+        rows = db.query(Mentoring, func.count().over()).options(
+            joinedload(Mentoring.mentor),
+            joinedload(Mentoring.sponsored)
+        ).filter(
+            column == user_id
+        ).order_by(Mentoring.created_at.desc(), Mentoring.id.desc()).limit(DASHBOARD_SECTION_LIMIT).all()
+        return {"items": [mentoring for mentoring, _ in rows], "total": rows[0][1] if rows else 0}
+    return section
+
+
+SECTIONS: Dict[str, Callable[[Session, int], Dict[str, Any]]] = {
+    "presences": _recent_presences,
+    "events": _attended_events,
+    "mentoring": _mentoring(Mentoring.mentor_id),
+    "sponsored": _mentoring(Mentoring.sponsored_id),
+}
+
+
+def _run_section(session_factory: Callable[[], Session], name: str, user_id: int) -> Any:
+    db = session_factory()
+    try:
+        # Sérialisé tant que la session est ouverte
+        return Dashboard.model_fields[name].annotation.model_validate(SECTIONS[name](db, user_id))
+    finally:
+        db.close()
+
+
+async def get_dashboard(user: User, read_primary: bool = False) -> Dashboard:
+    """Tableau de bord de ``user`` (cache, sinon sections lues en parallèle)"""
+    # Un client qui vient d'écrire ne lit ni le cache (peut-être tenu par un autre processus) ni un réplica
+    cached = None if read_primary else dashboard_cache.get(user.id)
+    if cached is not None:
+        return cached
+
+    session_factory = SessionLocal if read_primary else ReadSessionLocal
+    generation = dashboard_cache.generation(user.id)
+    sections = await asyncio.gather(*[
+        run_in_threadpool(_run_section, session_factory, name, user.id) for name in SECTIONS
+    ])
+    dashboard = Dashboard(
+        user=user,
+        generated_at=datetime.now(timezone.utc),
+        **dict(zip(SECTIONS, sections))
+    )
+    dashboard_cache.put(user.id, dashboard, generation)
+    return dashboard
+
+
+# Colonnes désignant les utilisateurs concernés par une écriture
+_USER_COLUMNS = {
+    User: ("id",),
+    Presence: ("user_id",),
+    EventParticipation: ("user_id",),
+    Mentoring: ("mentor_id", "sponsored_id"),
+}
+
+
+def _touched_users(objects: Iterable[Any]) -> Tuple[Set[int], bool]:
+    """Utilisateurs concernés par des écritures, et si tout le cache est à vider"""
+    user_ids: Set[int] = set()
+    clear_all = False
+    for obj in objects:
+        if isinstance(obj, (Event, Classroom)):
+            clear_all = True
+            continue
+        state = inspect(obj)
+        for column in _USER_COLUMNS.get(type(obj), ()):
+            # Anciennes valeurs comprises : un mentorat réattribué concerne aussi l'ancien mentor
+            user_ids.update(state.attrs[column].history.sum())
+            user_ids.add(state.dict.get(column))
+    user_ids.discard(None)
+    return user_ids, clear_all
+
+
+@event.listens_for(Session, "after_flush")
+def _track_dashboard_writes(session: Session, flush_context) -> None:
+    user_ids, clear_all = _touched_users(itertools.chain(session.new, session.dirty, session.deleted))
+    if user_ids:
+        session.info.setdefault("dashboard_users", set()).update(user_ids)
+    if clear_all:
+        session.info["dashboard_clear"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_dashboards_on_commit(session: Session) -> None:
+    if session.info.pop("dashboard_clear", False):
+        dashboard_cache.clear()
+    user_ids = session.info.pop("dashboard_users", None)
+    if user_ids:
+        dashboard_cache.invalidate(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_dashboard_writes_on_rollback(session: Session) -> None:
+    session.info.pop("dashboard_users", None)
+    session.info.pop("dashboard_clear", None)
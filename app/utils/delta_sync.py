@@ -0,0 +1,122 @@
+"""
+Synchronisation incrémentale des listes (``?updated_since=``)
+
+Avec ``updated_since`` (date ISO 8601 ou ``watermark`` d'une réponse précédente),
+une liste ne renvoie que les lignes créées ou modifiées depuis ce point, dans
+l'ordre ``(coalesce(updated_at, created_at), id)`` servi par un index, et la
+réponse devient ``{"items", "deleted", "watermark", "has_more"}`` :
+
+- ``deleted`` : identifiants supprimés sur la même période, lus dans le journal
+  des modifications (table ``outbox``) ;
+- ``watermark`` : à renvoyer tel quel dans ``updated_since`` (page suivante si
+  ``has_more``, sinon prochaine synchronisation).
+
+``updated_at`` et ``created_at`` valent l'heure de *début* de la transaction
+d'écriture : les lignes et suppressions postérieures au début de la plus ancienne
+transaction en cours ne sont pas encore renvoyées, pour ne jamais placer le
+``watermark`` après une écriture qui sera validée plus tard. Une ligne peut donc
+être renvoyée deux fois ; le client applique ``items`` puis ``deleted``.
+Les suppressions n'étant conservées que ``OUTBOX_RETENTION_DAYS`` jours, un
+``updated_since`` plus ancien reçoit 410 (synchronisation complète nécessaire).
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+from pydantic_core import to_jsonable_python
+from sqlalchemy import func, literal, text, tuple_
+from sqlalchemy.orm import Query as OrmQuery, Session
+
+from app.models.outbox_record import OutboxRecord
+from app.utils.fields import FieldSelection
+from app.utils.negotiation import NegotiatedResponse
+from app.utils.outbox import ChangeOperation, OUTBOX_RETENTION_DAYS, TRACKED_MODELS
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+def modified_at(model: Any) -> Any:
+    """Date de dernière écriture d'une ligne (expression des index ``ix_<table>_modified``)"""
+    return func.coalesce(model.updated_at, model.created_at)
+
+
+def _parse_position(value: str) -> Tuple[datetime, int]:
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        position = decode_cursor(value, at=datetime.fromisoformat, id=int)
+        return position["at"], position["id"]
+    return (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)), 0
+
+
+def _horizon(db: Session) -> datetime:
+    """Début de la plus ancienne transaction ouverte sur la base (celle-ci comprise)"""
+    return db.execute(text(
+        "SELECT min(xact_start) FROM pg_stat_activity "
+        "WHERE datname = current_database() AND backend_type = 'client backend'"
+    )).scalar()
+
+
+class DeltaSync:
+    def __init__(self, model: Any, updated_since: Optional[str]):
+        self.model = model
+        self.entity = TRACKED_MODELS[model]
+        self.since = _parse_position(updated_since) if updated_since else None
+        if self.since is not None and self.since[0] < datetime.now(timezone.utc) - timedelta(days=OUTBOX_RETENTION_DAYS):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail=f"updated_since antérieur à {OUTBOX_RETENTION_DAYS} jours : synchronisation complète nécessaire"
+            )
+        self.limit = 0
+        self.horizon: Optional[datetime] = None
+
+    def fetch(self, db: Session, query: OrmQuery, skip: int, limit: int) -> List[Any]:
+        """Lignes de la liste ; en synchronisation, ``skip`` est ignoré au profit de la position"""
+        if self.since is None:
+            return query.offset(skip).limit(limit).all()
+        self.limit = limit
+        self.horizon = _horizon(db)
+        modified = modified_at(self.model)
+        at, last_id = self.since
+        return query.add_columns(modified).filter(
+            tuple_(modified, self.model.id) > tuple_(literal(at), literal(last_id)),
+            modified < self.horizon
+        ).order_by(modified, self.model.id).limit(limit + 1).all()
+
+    def render(self, db: Session, selection: FieldSelection, rows: List[Any]) -> Any:
+        """Réponse de la route : liste habituelle, ou page de synchronisation"""
+        if self.since is None:
+            return selection.render(rows)
+        has_more = len(rows) > self.limit
+        page = rows[:self.limit]
+        if has_more:
+            last, last_modified = page[-1]
+            watermark = (last_modified, last.id)
+        else:
+            # Tout ce qui précède l'horizon a été renvoyé ; le watermark ne recule jamais
+            watermark = max(self.since, (self.horizon, 0))
+
+        deleted = [row.entity_id for row in db.query(OutboxRecord.entity_id).filter(
+            OutboxRecord.entity == self.entity.value,
+            OutboxRecord.operation == ChangeOperation.delete.value,
+            OutboxRecord.created_at >= self.since[0],
+            OutboxRecord.created_at < watermark[0]
+        ).distinct().order_by(OutboxRecord.entity_id)]
+
+        items = [row for row, _ in page]
+        body = {
+            "items": items if selection.is_default else selection.dump(items),
+            "deleted": deleted,
+            "watermark": encode_cursor({"at": watermark[0].isoformat(), "id": watermark[1]}),
+            "has_more": has_more,
+        }
+        return body if selection.is_default else NegotiatedResponse(to_jsonable_python(body))
+
+
+def delta_sync(model: Any):
+    """Dépendance ``updated_since`` pour une liste de ``model``"""
+    def dependency(
+        updated_since: Optional[str] = Query(None, description="Date ISO 8601 ou watermark de la réponse précédente")
+    ) -> DeltaSync:
+        return DeltaSync(model, updated_since)
+    return dependency
@@ -0,0 +1,139 @@
+"""
+Sélection des champs renvoyés par les listes (sparse fieldsets)
+
+- ``fields=id,timestamp,user.name`` : seuls ces champs sont renvoyés, et seules
+  les colonnes correspondantes sont lues en SQL (``load_only``) ;
+- ``include=classroom,user`` : relations imbriquées à charger. Sans ``fields`` ni
+  ``include``, la réponse est inchangée ; ``include=`` (vide) n'en charge aucune.
+
+Les relations demandées sont jointes dans la même requête, les autres ne sont
+pas chargées (``noload``).
+"""
+
+from typing import Any, Dict, List, Optional, Set, Type
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, noload
+
+from app.utils.negotiation import NegotiatedResponse
+
+
+def _relation_schemas(model: Any, schema: Type[BaseModel]) -> Dict[str, Type[BaseModel]]:
+    """Relations du modèle imbriquées dans le schéma de réponse"""
+    relationships = inspect(model).relationships
+    return {
+        name: field.annotation
+        for name, field in schema.model_fields.items()
+        if name in relationships and isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel)
+    }
+
+
+class FieldSelection:
+    def __init__(self, model: Any, schema: Type[BaseModel], fields: Optional[str], include: Optional[str]):
+        self.model = model
+        self.relation_schemas = _relation_schemas(model, schema)
+        self.scalar_fields = [name for name in schema.model_fields if name not in self.relation_schemas]
+        self.is_default = fields is None and include is None
+
+        self.columns: List[str] = list(self.scalar_fields)
+        # Relation -> champs renvoyés de l'objet lié
+        self.relations: Dict[str, List[str]] = {
+            name: list(related.model_fields) for name, related in self.relation_schemas.items()
+        }
+        if self.is_default:
+            return
+
+        if fields is not None:
+            self.columns, self.relations = ["id"], {}
+            for name in self._split(fields):
+                relation, _, subfield = name.partition(".")
+                if relation in self.relation_schemas:
+                    self._add_relation(relation, subfield or None)
+                elif not subfield and name in self.scalar_fields:
+                    if name not in self.columns:
+                        self.columns.append(name)
+                else:
+                    self._reject("fields", name, self.scalar_fields + sorted(self.relation_schemas))
+        elif include is not None:
+            self.relations = {}
+
+        for relation in self._split(include or ""):
+            if relation not in self.relation_schemas:
+                self._reject("include", relation, sorted(self.relation_schemas))
+            self._add_relation(relation, None)
+
+    @staticmethod
+    def _split(value: str) -> List[str]:
+        return [name.strip() for name in value.split(",") if name.strip()]
+
+    @staticmethod
+    def _reject(parameter: str, name: str, allowed: List[str]) -> None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Champ inconnu dans {parameter} : {name} (valeurs possibles : {', '.join(allowed)})"
+        )
+
+    def _add_relation(self, relation: str, subfield: Optional[str]) -> None:
+        related_fields = list(self.relation_schemas[relation].model_fields)
+        if subfield is None:
+            self.relations[relation] = related_fields
+            return
+        if subfield not in related_fields:
+            self._reject("fields", f"{relation}.{subfield}", [f"{relation}.{name}" for name in related_fields])
+        selected = self.relations.setdefault(relation, ["id"])
+        if subfield not in selected:
+            selected.append(subfield)
+
+    def options(self) -> List[Any]:
+        """Options de chargement : colonnes utiles seulement, relations jointes ou ignorées"""
+        if self.is_default:
+            return [joinedload(getattr(self.model, relation)) for relation in self.relations]
+
+        mapper = inspect(self.model)
+        # Les clés étrangères des relations demandées sont lues même si elles ne sont pas renvoyées
+        columns: Set[str] = set(self.columns)
+        for relation in self.relations:
+            columns.update(column.key for column in mapper.relationships[relation].local_columns)
+
+        options: List[Any] = [load_only(*[getattr(self.model, name) for name in sorted(columns)])]
+        for relation in self.relation_schemas:
+            attribute = getattr(self.model, relation)
+            if relation in self.relations:
+                related = mapper.relationships[relation].mapper.class_
+                options.append(joinedload(attribute).load_only(
+                    *[getattr(related, name) for name in self.relations[relation]]
+                ))
+            else:
+                options.append(noload(attribute))
+        return options
+
+    def _dump(self, row: Any) -> Dict[str, Any]:
+        data = {name: getattr(row, name) for name in self.columns}
+        for relation, related_fields in self.relations.items():
+            related = getattr(row, relation)
+            data[relation] = None if related is None else {name: getattr(related, name) for name in related_fields}
+        return data
+
+    def dump(self, rows: List[Any]) -> List[Dict[str, Any]]:
+        """Champs sélectionnés de chaque ligne"""
+        return [self._dump(row) for row in rows]
+
+    def render(self, rows: List[Any]) -> Any:
+        """Réponse de la route : objets complets (validés par le schéma) ou champs sélectionnés"""
+        if self.is_default:
+            return rows
+        # Même encodage que les schémas Pydantic (dates ISO 8601), en JSON ou MessagePack
+        return NegotiatedResponse(to_jsonable_python(self.dump(rows)))
+
+
+def field_selection(model: Any, schema: Type[BaseModel]):
+    """Dépendance ``fields`` / ``include`` pour une liste de ``model`` sérialisée avec ``schema``"""
+    def dependency(
+        fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules (ex. id,user.name)"),
+        include: Optional[str] = Query(None, description="Relations à inclure, séparées par des virgules")
+    ) -> FieldSelection:
+        return FieldSelection(model, schema, fields, include)
+    return dependency
@@ -0,0 +1,207 @@
+"""
+Prévision d'occupation des salles à partir de moyennes saisonnières précalculées
+
+Les moyennes (salle × jour de la semaine × heure) sont stockées dans la table
+``occupancy_baselines`` et mises à jour de façon incrémentale : chaque
+rafraîchissement n'intègre que les jours écoulés depuis le précédent.
+"""
+
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sqlalchemy import func, extract, insert
+from sqlalchemy.orm import Session
+
+from app.models.classroom import Classroom
+from app.models.occupancy_baseline import OccupancyBaseline
+from app.models.presence import Presence
+from app.utils.analytics import WEEKDAYS, HOURS, weekday_of
+
+# Poids du jour le plus récent dans la moyenne mobile exponentielle
+FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.3"))
+# Historique intégré lors du premier calcul d'une salle (16 semaines)
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "112"))
+
+
+def refresh_baselines(db: Session, until: Optional[date] = None) -> int:
+    """Intégrer les jours écoulés depuis le dernier rafraîchissement.
+
+    Retourne le nombre de jours intégrés dans les moyennes.
+    """
+    until = until or date.today() - timedelta(days=1)
+
+    classroom_ids = np.array([row.id for row in db.query(Classroom.id).order_by(Classroom.id).all()], dtype=np.int64)
+    if not classroom_ids.size:
+        return 0
+
+    # État courant des moyennes, chargé dans des tableaux denses
+    levels = np.zeros((len(classroom_ids), WEEKDAYS, HOURS), dtype=np.float64)
+    samples = np.zeros((len(classroom_ids), WEEKDAYS, HOURS), dtype=np.int64)
+    default_watermark = np.datetime64(until - timedelta(days=FORECAST_HISTORY_DAYS), "D")
+    watermarks = np.full(len(classroom_ids), default_watermark, dtype="datetime64[D]")
+
+    baselines = db.query(
+        OccupancyBaseline.classroom_id,
+        OccupancyBaseline.weekday,
+        OccupancyBaseline.hour,
+        OccupancyBaseline.expected_presences,
+        OccupancyBaseline.samples,
+        OccupancyBaseline.last_observed_date
+    ).all()
+    if baselines:
+        columns = list(zip(*baselines))
+        baseline_ids = np.asarray(columns[0], dtype=np.int64)
+        index = np.searchsorted(classroom_ids, baseline_ids)
+        # Les salles supprimées depuis le dernier calcul sont ignorées
+        known = (index < len(classroom_ids)) & (classroom_ids[np.minimum(index, len(classroom_ids) - 1)] == baseline_ids)
+        index = index[known]
+        weekdays = np.asarray(columns[1], dtype=np.int64)[known]
+        hours = np.asarray(columns[2], dtype=np.int64)[known]
+        levels[index, weekdays, hours] = np.asarray(columns[3], dtype=np.float64)[known]
+        samples[index, weekdays, hours] = np.asarray(columns[4], dtype=np.int64)[known]
+        watermarks[index] = np.asarray([str(value) for value in columns[5]], dtype="datetime64[D]")[known]
+
+    start = watermarks.min() + 1
+    end = np.datetime64(until, "D")
+    if start > end:
+        return 0
+
+    # Observations des jours à intégrer : une seule requête agrégée
+    day = func.date(Presence.timestamp)
+    hour = extract('hour', Presence.timestamp)
+    rows = db.query(
+        Presence.classroom_id,
+        day.label('day'),
+        hour.label('hour'),
+        func.count(Presence.id).label('count')
+    ).filter(
+        day.between(start.item(), end.item()),
+        Presence.presence == True
+    ).group_by(Presence.classroom_id, day, hour).all()
+
+    days = np.arange(start, end + 1, dtype="datetime64[D]")
+    observations = np.zeros((len(days), len(classroom_ids), HOURS), dtype=np.float64)
+    if rows:
+        columns = list(zip(*rows))
+        index = np.searchsorted(classroom_ids, np.asarray(columns[0], dtype=np.int64))
+        day_index = (np.asarray([str(value) for value in columns[1]], dtype="datetime64[D]") - start).astype(np.int64)
+        np.add.at(
+            observations,
+            (day_index, index, np.asarray(columns[2], dtype=np.int64)),
+            np.asarray(columns[3], dtype=np.float64)
+        )
+
+    for offset, weekday in enumerate(weekday_of(days)):
+        # Jour sans aucune présence sur le campus (fermeture, vacances) : ignoré
+        if not observations[offset].any():
+            continue
+        pending = watermarks < days[offset]
+        observed = observations[offset][pending]
+        previous = levels[pending, weekday, :]
+        first = samples[pending, weekday, :] == 0
+        levels[pending, weekday, :] = np.where(
+            first,
+            observed,
+            FORECAST_ALPHA * observed + (1 - FORECAST_ALPHA) * previous
+        )
+        samples[pending, weekday, :] += 1
+
+    # Réécriture complète des moyennes dans la même transaction
+    classroom_index, weekday_index, hour_index = np.indices(levels.shape).reshape(3, -1)
+    db.query(OccupancyBaseline).delete(synchronize_session=False)
+    db.execute(insert(OccupancyBaseline), [
+        {
+            "classroom_id": int(classroom_ids[c]),
+            "weekday": int(w),
+            "hour": int(h),
+            "expected_presences": float(levels[c, w, h]),
+            "samples": int(samples[c, w, h]),
+            "last_observed_date": until
+        }
+        for c, w, h in zip(classroom_index, weekday_index, hour_index)
+    ])
+    db.commit()
+    return len(days)
+
+
+def get_forecast(
+    db: Session,
+    start_date: date,
+    days: int,
+    classroom_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """Prévision horaire par salle lue directement depuis les moyennes précalculées"""
+    query = db.query(
+        OccupancyBaseline.classroom_id,
+        Classroom.name,
+        Classroom.capacity,
+        OccupancyBaseline.weekday,
+        OccupancyBaseline.hour,
+        OccupancyBaseline.expected_presences,
+        OccupancyBaseline.last_observed_date
+    ).join(Classroom, Classroom.id == OccupancyBaseline.classroom_id)
+
+    if classroom_id:
+        query = query.filter(OccupancyBaseline.classroom_id == classroom_id)
+
+    rows = query.all()
+    dates = np.arange(np.datetime64(start_date, "D"), np.datetime64(start_date, "D") + days, dtype="datetime64[D]")
+    if not rows:
+        return {"based_on": None, "dates": [str(d) for d in dates], "classrooms": []}
+
+    columns = list(zip(*rows))
+    classroom_ids, first_index, index = np.unique(np.asarray(columns[0], dtype=np.int64), return_index=True, return_inverse=True)
+    capacities = np.asarray(columns[2], dtype=np.float64)[first_index]
+    levels = np.zeros((len(classroom_ids), WEEKDAYS, HOURS), dtype=np.float64)
+    levels[index, np.asarray(columns[3], dtype=np.int64), np.asarray(columns[4], dtype=np.int64)] = np.asarray(columns[5], dtype=np.float64)
+
+    # Projection sur les jours demandés : (salle, jour, heure)
+    expected = levels[:, weekday_of(dates), :]
+    occupancy = np.divide(
+        expected * 100,
+        capacities[:, np.newaxis, np.newaxis],
+        out=np.zeros_like(expected),
+        where=capacities[:, np.newaxis, np.newaxis] > 0
+    )
+    peaks = expected.reshape(len(classroom_ids), -1).argmax(axis=1)
+
+    classrooms = []
+    for position, current_id in enumerate(classroom_ids):
+        name = columns[1][first_index[position]]
+        peak_day, peak_hour = divmod(int(peaks[position]), HOURS)
+        overflow_days, overflow_hours = np.nonzero(expected[position] > capacities[position])
+        classrooms.append({
+            "classroom_id": int(current_id),
+            "classroom_name": name,
+            "capacity": int(capacities[position]),
+            "expected_presences": np.round(expected[position], 2).tolist(),
+            "occupancy_percentage": np.round(occupancy[position], 2).tolist(),
+            "peak": {
+                "date": str(dates[peak_day]),
+                "hour": peak_hour,
+                "expected_presences": round(float(expected[position, peak_day, peak_hour]), 2)
+            },
+            "overflow_slots": [
+                {"date": str(dates[d]), "hour": int(h), "expected_presences": round(float(expected[position, d, h]), 2)}
+                for d, h in zip(overflow_days, overflow_hours)
+            ]
+        })
+
+    return {
+        "based_on": max(columns[6]),
+        "dates": [str(d) for d in dates],
+        "classrooms": classrooms
+    }
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        integrated = refresh_baselines(db)
+        print(f"{integrated} jour(s) intégré(s) dans les moyennes d'occupation")
+    finally:
+        db.close()
@@ -0,0 +1,183 @@
+"""
+Écriture groupée des présences (group commit)
+
+En mode groupé (``PRESENCE_GROUP_COMMIT=true``), les présences validées sont
+placées dans une file et insérées par lots (un INSERT multi-lignes et un seul
+COMMIT) toutes les ``GROUP_COMMIT_INTERVAL_MS`` millisecondes ou dès que
+``GROUP_COMMIT_MAX_ROWS`` lignes sont en attente. Chaque requête HTTP attend la
+validation de son lot : la réponse n'est envoyée qu'une fois la ligne durable.
+
+Une requête dont le lot n'est pas validé dans ``GROUP_COMMIT_TIMEOUT_SECONDS``
+retire sa présence de la file : elle ne sera pas insérée plus tard à l'insu du
+client. Seul cas contraire : le lot était déjà en cours d'écriture et n'a pas
+abouti après une seconde attente ; l'issue est alors inconnue du client, qui
+peut réessayer sans risque (un doublon du jour est refusé).
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, tuple_
+
+from app.database import SessionLocal
+from app.models.presence import Presence
+from app.utils.dashboard import dashboard_cache
+from app.utils.outbox import ChangeOperation, record_changes
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_GROUP_COMMIT = os.getenv("PRESENCE_GROUP_COMMIT", "false").lower() == "true"
+GROUP_COMMIT_INTERVAL_MS = int(os.getenv("GROUP_COMMIT_INTERVAL_MS", "10"))
+GROUP_COMMIT_MAX_ROWS = int(os.getenv("GROUP_COMMIT_MAX_ROWS", "500"))
+# Attente maximale d'une requête sur la validation de son lot
+GROUP_COMMIT_TIMEOUT_SECONDS = float(os.getenv("GROUP_COMMIT_TIMEOUT_SECONDS", "10"))
+
+
+class DuplicatePresenceError(Exception):
+    """Une présence existe déjà pour cet utilisateur dans cette salle aujourd'hui"""
+
+
+class GroupCommitTimeout(Exception):
+    """Lot non validé dans le délai ; ``abandoned`` : présence retirée de la file, jamais insérée"""
+
+    def __init__(self, abandoned: bool):
+        super().__init__("présence abandonnée" if abandoned else "issue du lot inconnue")
+        self.abandoned = abandoned
+
+
+class PresenceBatcher:
+    def __init__(self, interval_ms: int = GROUP_COMMIT_INTERVAL_MS, max_rows: int = GROUP_COMMIT_MAX_ROWS):
+        self.interval = interval_ms / 1000
+        self.max_rows = max_rows
+        self._queue: "queue.Queue[Optional[Tuple[Dict[str, Any], Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, row: Dict[str, Any]) -> Future:
+        """Mettre une présence validée en file ; le futur reçoit la ligne insérée"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def wait(self, future: Future, timeout: float = GROUP_COMMIT_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """Ligne insérée, ou exception du lot ; GroupCommitTimeout si le lot n'est pas validé à temps"""
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            pass
+        # Pas encore prise par le thread d'écriture : retirée du lot, elle ne sera jamais insérée
+        if future.cancel():
+            raise GroupCommitTimeout(abandoned=True)
+        # Lot déjà en cours d'écriture : son issue est attendue une seconde fois
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise GroupCommitTimeout(abandoned=False)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="presence-group-commit", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Vider la file puis arrêter le thread d'écriture"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=GROUP_COMMIT_TIMEOUT_SECONDS)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[Dict[str, Any], Future]]) -> None:
+        # Doublons à l'intérieur du lot : seule la première présence est retenue
+        pending: List[Tuple[Dict[str, Any], Future]] = []
+        seen = set()
+        for row, future in batch:
+            # Requête qui a abandonné son attente : présence ignorée ; les autres ne sont plus annulables
+            if not future.set_running_or_notify_cancel():
+                continue
+            key = (row["classroom_id"], row["user_id"])
+            if key in seen:
+                future.set_exception(DuplicatePresenceError())
+            else:
+                seen.add(key)
+                pending.append((row, future))
+        if not pending:
+            return
+
+        db = SessionLocal()
+        try:
+            # Doublons avec des présences validées depuis le contrôle fait par la requête
+            existing = set(db.query(Presence.classroom_id, Presence.user_id).filter(
+                tuple_(Presence.classroom_id, Presence.user_id).in_(list(seen)),
+                func.date(Presence.timestamp) == date.today()
+            ).all())
+            accepted = []
+            for row, future in pending:
+                if (row["classroom_id"], row["user_id"]) in existing:
+                    future.set_exception(DuplicatePresenceError())
+                else:
+                    accepted.append((row, future))
+            if not accepted:
+                return
+
+            result = db.execute(
+                insert(Presence).returning(
+                    Presence.id,
+                    Presence.presence,
+                    Presence.classroom_id,
+                    Presence.user_id,
+                    Presence.timestamp,
+                    sort_by_parameter_order=True
+                ),
+                [row for row, _ in accepted]
+            )
+            inserted = [dict(row._mapping) for row in result]
+            # Insertion hors unité de travail ORM : journal des modifications et tableaux de bord traités ici
+            record_changes(db.connection(), Presence, ChangeOperation.insert, [row["id"] for row in inserted])
+            db.commit()
+            dashboard_cache.invalidate({row["user_id"] for row, _ in accepted})
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Échec de l'écriture d'un lot de %d présence(s)", len(pending))
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            db.close()
+
+        for (_, future), row in zip(accepted, inserted):
+            future.set_result(row)
+
+
+presence_batcher = PresenceBatcher()
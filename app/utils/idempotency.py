@@ -0,0 +1,285 @@
+"""
+Clés d'idempotence (en-tête ``Idempotency-Key``) sur les POST et PUT
+
+Une requête portant une clé déjà vue (même méthode, même chemin, même
+auteur) reçoit la réponse enregistrée la première fois, avec l'en-tête
+``Idempotent-Replayed: true``, sans que la route ne soit exécutée de nouveau.
+La même clé avec un corps différent est refusée (422) ; une clé dont la
+première requête est encore en cours reçoit 409.
+
+Les réponses (hors erreurs serveur et refus d'accès) sont conservées
+``IDEMPOTENCY_TTL_SECONDS`` secondes, corps compressé, en mémoire
+(``IDEMPOTENCY_STORE=memory``) ou dans la table ``idempotency_keys``
+(``IDEMPOTENCY_STORE=postgres``, partagée entre les processus).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.negotiation import transcode
+
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "memory").lower()
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# Réservation d'une clé par un processus qui s'est arrêté en cours de requête : libérée après ce délai
+IDEMPOTENCY_LOCK_SECONDS = 60
+# Au-delà, la requête ou la réponse n'est pas prise en charge (imports CSV, etc.)
+IDEMPOTENCY_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", str(1024 * 1024)))
+
+HEADER_NAME = b"idempotency-key"
+REPLAY_HEADER = (b"idempotent-replayed", b"true")
+IDEMPOTENT_METHODS = {"POST", "PUT"}
+MAX_KEY_LENGTH = 255
+# Réponses qui dépendent du moment et non de la requête : la même clé pourra être rejouée
+_UNSTORED_STATUSES = {401, 403, 408, 409, 429}
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes  # compressé
+
+
+class MemoryIdempotencyStore:
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL_SECONDS, max_entries: int = IDEMPOTENCY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, StoredResponse]]" = OrderedDict()
+        self._in_flight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def lookup(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            return self._get(key)
+
+    async def begin(self, key: str, fingerprint: str) -> Tuple[Optional[StoredResponse], Optional[str]]:
+        """Réponse enregistrée, ou empreinte de la requête en cours avec cette clé, ou réservation de la clé"""
+        with self._lock:
+            stored = self._get(key)
+            if stored is not None:
+                return stored, None
+            if key in self._in_flight:
+                return None, self._in_flight[key]
+            self._in_flight[key] = fingerprint
+            return None, None
+
+    def remember(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        self.remember(key, response)
+        await self.abandon(key)
+
+    async def abandon(self, key: str) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+
+class PostgresIdempotencyStore:
+    """Table ``idempotency_keys`` : une ligne sans réponse réserve la clé pour tous les processus"""
+
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL_SECONDS):
+        self.ttl = ttl
+        # Les réponses enregistrées ne changent plus : gardées aussi en mémoire
+        self._cache = MemoryIdempotencyStore(ttl)
+
+    def _begin(self, key: str, fingerprint: str) -> Tuple[Optional[StoredResponse], Optional[str]]:
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            db.query(IdempotencyKey).filter(IdempotencyKey.key == key, IdempotencyKey.expires_at <= now).delete(synchronize_session=False)
+            reserved = db.execute(
+                insert(IdempotencyKey).values(
+                    key=key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+                ).on_conflict_do_nothing().returning(IdempotencyKey.key)
+            ).scalar()
+            db.commit()
+            if reserved is not None:
+                return None, None
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+        finally:
+            db.close()
+        if row is None or row.status_code is None:
+            # Requête en cours dans un autre processus (ou ligne expirée entre-temps)
+            return None, row.fingerprint if row is not None else fingerprint
+        stored = StoredResponse(row.fingerprint, row.status_code, [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.headers], row.body)
+        self._cache.remember(key, stored)
+        return stored, None
+
+    async def begin(self, key: str, fingerprint: str) -> Tuple[Optional[StoredResponse], Optional[str]]:
+        stored = self._cache.lookup(key)
+        if stored is not None:
+            return stored, None
+        return await run_in_threadpool(self._begin, key, fingerprint)
+
+    def _complete(self, key: str, response: StoredResponse) -> None:
+        db = SessionLocal()
+        try:
+            db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update({
+                "status_code": response.status,
+                "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers],
+                "body": response.body,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        self._cache.remember(key, response)
+        await run_in_threadpool(self._complete, key, response)
+
+    def _abandon(self, key: str) -> None:
+        db = SessionLocal()
+        try:
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    async def abandon(self, key: str) -> None:
+        await run_in_threadpool(self._abandon, key)
+
+
+def _error(status: int, detail: str) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    return status, [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())], body
+
+
+async def _send_response(send: Send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _replayed(stored: StoredResponse, accept: str) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """Réponse enregistrée, dans le format (JSON ou MessagePack) demandé par la requête rejouée"""
+    body = zlib.decompress(stored.body)
+    content_type = next((value for name, value in stored.headers if name.lower() == b"content-type"), b"").decode("latin-1")
+    converted = transcode(body, content_type, accept)
+    if converted is None:
+        return stored.status, stored.headers + [REPLAY_HEADER], body
+    body, media_type = converted
+    headers = [(name, value) for name, value in stored.headers if name.lower() not in (b"content-type", b"content-length")]
+    headers += [(b"content-type", media_type.encode()), (b"content-length", str(len(body)).encode())]
+    return stored.status, headers + [REPLAY_HEADER], body
+
+
+class IdempotencyMiddleware:
+    """Rejouer la réponse d'une requête d'écriture déjà traitée avec la même ``Idempotency-Key``"""
+
+    def __init__(self, app: ASGIApp, store=None):
+        self.app = app
+        if store is None:
+            store = PostgresIdempotencyStore() if IDEMPOTENCY_STORE == "postgres" else MemoryIdempotencyStore()
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        client_key = headers.get(HEADER_NAME)
+        if client_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            await _send_response(send, *_error(400, f"Idempotency-Key doit contenir entre 1 et {MAX_KEY_LENGTH} caractères"))
+            return
+
+        # Corps lu en entier pour en calculer l'empreinte ; trop gros, la requête passe sans idempotence
+        messages: List[Message] = []
+        size = 0
+        more_body = True
+        while more_body and size <= IDEMPOTENCY_MAX_BODY_BYTES:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            size += len(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+        async def replay_receive() -> Message:
+            return messages.pop(0) if messages else await receive()
+
+        if more_body:
+            await self.app(scope, replay_receive, send)
+            return
+
+        fingerprint = hashlib.sha256(b"".join(message.get("body", b"") for message in messages)).hexdigest()
+        # Une clé n'est valable que pour une méthode, un chemin et un auteur
+        key = hashlib.sha256(b"\0".join([
+            scope["method"].encode(),
+            scope["path"].encode(),
+            scope.get("query_string", b""),
+            headers.get(b"authorization", b""),
+            client_key,
+        ])).hexdigest()
+
+        stored, in_flight = await self.store.begin(key, fingerprint)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                await _send_response(send, *_error(422, "Idempotency-Key déjà utilisée avec une requête différente"))
+                return
+            await _send_response(send, *_replayed(stored, headers.get(b"accept", b"").decode("latin-1")))
+            return
+        if in_flight is not None:
+            if in_flight != fingerprint:
+                await _send_response(send, *_error(422, "Idempotency-Key déjà utilisée avec une requête différente"))
+                return
+            status, error_headers, body = _error(409, "Une requête avec cette Idempotency-Key est en cours de traitement")
+            await _send_response(send, status, error_headers + [(b"retry-after", b"1")], body)
+            return
+
+        response: Dict[str, object] = {"status": 500, "headers": [], "body": []}
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture)
+        except BaseException:
+            await self.store.abandon(key)
+            raise
+
+        status = response["status"]
+        body = b"".join(response["body"])
+        if status >= 500 or status in _UNSTORED_STATUSES or len(body) > IDEMPOTENCY_MAX_BODY_BYTES:
+            await self.store.abandon(key)
+            return
+        await self.store.complete(key, StoredResponse(fingerprint, status, response["headers"], zlib.compress(body, 1)))
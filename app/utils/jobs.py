@@ -0,0 +1,69 @@
+"""
+Tâches de fond enregistrées auprès du planificateur
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+from app.models.job_run import JobRun
+from app.utils.forecast import refresh_baselines
+from app.utils.materialized_views import refresh_stale_views
+from app.utils import outbox
+from app.utils.recommendations import compute_similarities
+from app.utils.scheduler import scheduler, JOB_RUNS_RETENTION_DAYS
+
+
+@scheduler.register("refresh_occupancy_baselines", "15 2 * * *")
+def refresh_occupancy_baselines(db: Session) -> str:
+    """Intégrer la journée écoulée dans les moyennes de prévision"""
+    integrated = refresh_baselines(db)
+    return f"{integrated} jour(s) intégré(s)"
+
+
+@scheduler.register("refresh_materialized_views", "* * * * *")
+def refresh_materialized_views(db: Session) -> str:
+    """Rafraîchir les vues matérialisées trop anciennes ou trop modifiées"""
+    refreshed = refresh_stale_views(db)
+    return f"Vues rafraîchies : {', '.join(refreshed)}" if refreshed else "Aucune vue à rafraîchir"
+
+
+@scheduler.register("refresh_event_similarities", "20 * * * *")
+def refresh_event_similarities(db: Session) -> str:
+    """Recalculer les événements similaires servant aux recommandations"""
+    pairs = compute_similarities(db)
+    return f"{pairs} paire(s) d'événements similaires"
+
+
+@scheduler.register("prune_job_runs", "45 3 * * *")
+def prune_job_runs(db: Session) -> str:
+    """Purger l'historique des exécutions trop ancien"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=JOB_RUNS_RETENTION_DAYS)
+    deleted = db.query(JobRun).filter(JobRun.started_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return f"{deleted} exécution(s) supprimée(s)"
+
+
+@scheduler.register("prune_idempotency_keys", "30 * * * *")
+def prune_idempotency_keys(db: Session) -> str:
+    """Supprimer les réponses d'idempotence expirées (IDEMPOTENCY_STORE=postgres)"""
+    deleted = db.query(IdempotencyKey).filter(IdempotencyKey.expires_at < datetime.now(timezone.utc)).delete(synchronize_session=False)
+    db.commit()
+    return f"{deleted} clé(s) d'idempotence supprimée(s)"
+
+
+@scheduler.register("relay_outbox", "* * * * *")
+def relay_outbox(db: Session) -> str:
+    """Publier les modifications non publiées du journal vers OUTBOX_RELAY_URL"""
+    if not outbox.OUTBOX_RELAY_URL:
+        return "Aucune destination configurée (OUTBOX_RELAY_URL)"
+    published = outbox.relay(db)
+    return f"{published} modification(s) publiée(s)"
+
+
+@scheduler.register("prune_outbox", "50 3 * * *")
+def prune_outbox(db: Session) -> str:
+    """Purger le journal des modifications au-delà de OUTBOX_RETENTION_DAYS"""
+    deleted = outbox.prune(db)
+    return f"{deleted} modification(s) supprimée(s) du journal"
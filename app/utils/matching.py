@@ -0,0 +1,252 @@
+"""
+Attribution automatique des mentors (appariement en masse)
+
+Les parrainés (utilisateurs d'un niveau donné sans mentorat sur le sujet) sont
+répartis sur les places libres des mentors (capacité moins le nombre de
+parrainés actuels). Le coût d'une affectation est calculé par vecteurs :
+
+- expérience du mentor sur le sujet (nombre de mentorats passés du même sujet) ;
+- niveau du mentor (ordre de préférence des niveaux demandés) ;
+- charge : chaque place supplémentaire d'un même mentor coûte un peu plus ;
+- affinité : sujets déjà suivis par le parrainé et déjà encadrés par le mentor
+  (similarité cosinus des profils de sujets, produit de matrices creuses).
+
+Le problème d'affectation est résolu par ``min_weight_full_bipartite_matching``
+(SciPy) sur un graphe creux : chaque parrainé n'est relié qu'aux places
+voisines de son rang dans le classement global des places (bande de
+``MATCHING_CANDIDATES`` places) et aux mentors avec qui il a une affinité,
+plus une place fictive « non attribué » qui garantit une solution. Les paires
+retenues sont insérées en une seule requête.
+
+Ligne de commande : ``python -m app.utils.matching "Algorithmique" L1 L3 M1 --capacity 3``
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.mentoring import Mentoring
+from app.models.user import User
+from app.utils.dashboard import dashboard_cache
+from app.utils.mentoring_graph import mentoring_graph
+from app.utils.outbox import ChangeOperation, record_changes
+
+# Nombre de places candidates par parrainé (taille de la bande autour de son rang)
+MATCHING_CANDIDATES = int(os.getenv("MATCHING_CANDIDATES", "32"))
+# Places les moins chères couvertes par les bandes, rapportées au nombre de parrainés
+MATCHING_SLACK = 1.25
+# Mentors d'affinité retenus au plus par parrainé
+MATCHING_AFFINITY_CANDIDATES = 8
+MATCHING_DESCRIPTION = "Attribution automatique"
+
+# Poids des composantes du coût
+EXPERIENCE_WEIGHT = 1.0
+LEVEL_WEIGHT = 0.5
+LOAD_WEIGHT = 1.0
+AFFINITY_WEIGHT = 2.0
+# Coût de la place fictive : plus élevé que toute affectation réelle
+UNMATCHED_COST = 1e6
+
+
+def _subject_profiles(pairs: List[Any], user_ids: np.ndarray, column: str, subjects: Dict[str, int]) -> csr_matrix:
+    """Nombre de mentorats par (utilisateur, sujet), lignes normalisées"""
+    positions = {int(user_id): index for index, user_id in enumerate(user_ids)}
+    rows, cols = [], []
+    for pair in pairs:
+        user_id = getattr(pair, column)
+        if user_id in positions:
+            rows.append(positions[user_id])
+            cols.append(subjects.setdefault(pair.subject, len(subjects)))
+    matrix = csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(user_ids), max(len(subjects), 1))
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return csr_matrix(matrix.multiply(1 / norms[:, None]))
+
+
+def match_mentors(
+    db: Session,
+    subject: str,
+    mentee_level: str,
+    mentor_levels: List[str],
+    capacity: int,
+    capacities: Optional[Dict[int, int]] = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """Apparier les parrainés de ``mentee_level`` avec les mentors de ``mentor_levels`` sur ``subject``"""
+    started = time.perf_counter()
+    capacities = capacities or {}
+    subject_key = subject.strip().lower()
+
+    already_matched = db.query(Mentoring.sponsored_id).filter(func.lower(Mentoring.subject) == subject_key)
+    mentee_ids = np.array([
+        row.id for row in db.query(User.id).filter(
+            User.level == mentee_level,
+            User.id.notin_(already_matched)
+        ).order_by(User.id)
+    ], dtype=np.int64)
+
+    loads = db.query(Mentoring.mentor_id, func.count(Mentoring.id).label("load")).group_by(Mentoring.mentor_id).subquery()
+    experience = db.query(Mentoring.mentor_id, func.count(Mentoring.id).label("count")).filter(
+        func.lower(Mentoring.subject) == subject_key
+    ).group_by(Mentoring.mentor_id).subquery()
+    mentor_rows = db.query(
+        User.id,
+        User.level,
+        func.coalesce(loads.c.load, 0),
+        func.coalesce(experience.c.count, 0)
+    ).outerjoin(loads, loads.c.mentor_id == User.id).outerjoin(
+        experience, experience.c.mentor_id == User.id
+    ).filter(User.level.in_(mentor_levels), User.level != mentee_level).order_by(User.id).all()
+
+    mentor_ids = np.array([row[0] for row in mentor_rows], dtype=np.int64)
+    level_rank = np.array([mentor_levels.index(row[1]) for row in mentor_rows], dtype=np.float64)
+    load = np.array([row[2] for row in mentor_rows], dtype=np.int64)
+    subject_count = np.array([row[3] for row in mentor_rows], dtype=np.float64)
+    mentor_capacity = np.array([capacities.get(int(mentor_id), capacity) for mentor_id in mentor_ids], dtype=np.int64)
+    free = np.maximum(mentor_capacity - load, 0)
+
+    report: Dict[str, Any] = {
+        "subject": subject,
+        "mentees": len(mentee_ids),
+        "mentors": int((free > 0).sum()),
+        "slots": int(free.sum()),
+        "pairs": [],
+        "unmatched": [],
+        "dry_run": dry_run,
+    }
+    if len(mentee_ids) == 0 or report["slots"] == 0:
+        report["unmatched"] = mentee_ids.tolist()
+        report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return report
+
+    # Places : une colonne par place libre, la j-ième place d'un mentor coûte un peu plus que la précédente
+    slot_mentor = np.repeat(np.arange(len(mentor_ids)), free)
+    slot_rank = np.arange(len(slot_mentor)) - np.repeat(np.cumsum(free) - free, free)
+    mentor_cost = LEVEL_WEIGHT * level_rank - EXPERIENCE_WEIGHT * np.log1p(subject_count)
+    slot_cost = mentor_cost[slot_mentor] + LOAD_WEIGHT * (load[slot_mentor] + slot_rank) / np.maximum(mentor_capacity[slot_mentor], 1)
+    n_mentees, n_slots = len(mentee_ids), len(slot_mentor)
+
+    # Affinité de sujets entre parrainés et mentors (matrice creuse parrainés x mentors)
+    history = db.query(Mentoring.mentor_id, Mentoring.sponsored_id, func.lower(Mentoring.subject).label("subject")).filter(
+        Mentoring.sponsored_id.in_(db.query(User.id).filter(User.level == mentee_level))
+        | Mentoring.mentor_id.in_(db.query(User.id).filter(User.level.in_(mentor_levels)))
+    ).all()
+    subjects: Dict[str, int] = {}
+    mentee_profiles = _subject_profiles(history, mentee_ids, "sponsored_id", subjects)
+    mentor_profiles = _subject_profiles(history, mentor_ids, "mentor_id", subjects)
+    mentee_profiles.resize((n_mentees, len(subjects) or 1))
+    affinity = (mentee_profiles @ mentor_profiles.T).tocsr()
+
+    # Candidats : bande de places autour du rang du parrainé dans le classement global des places
+    order = np.argsort(slot_cost, kind="stable")
+    band = min(MATCHING_CANDIDATES, n_slots)
+    # Les bandes couvrent les places les moins chères avec une marge, pour que les places laissées
+    # par les parrainés servis par affinité restent accessibles aux autres
+    span = min(n_slots, int(np.ceil(n_mentees * MATCHING_SLACK)))
+    first = np.clip(np.arange(n_mentees) * span // n_mentees - band // 2, 0, n_slots - band)
+    rows = [np.repeat(np.arange(n_mentees), band)]
+    cols = [order[(first[:, None] + np.arange(band)).ravel()]]
+
+    # ... et toutes les places des mentors avec qui il a le plus d'affinité
+    slot_start = np.cumsum(free) - free
+    for mentee in np.flatnonzero(np.diff(affinity.indptr)):
+        start, end = affinity.indptr[mentee], affinity.indptr[mentee + 1]
+        indices = affinity.indices[start:end]
+        # À affinité égale, rotation selon le parrainé pour ne pas concentrer tout le monde sur les mêmes mentors
+        tie_break = (indices - mentee) % len(mentor_ids)
+        mentors = indices[np.lexsort((tie_break, -affinity.data[start:end]))[:MATCHING_AFFINITY_CANDIDATES]]
+        mentors = mentors[free[mentors] > 0]
+        if len(mentors):
+            slots = np.concatenate([slot_start[mentor] + np.arange(free[mentor]) for mentor in mentors])
+            rows.append(np.full(len(slots), mentee))
+            cols.append(slots)
+
+    rows_all, cols_all = np.concatenate(rows), np.concatenate(cols)
+    unique = np.unique(rows_all * n_slots + cols_all)
+    rows_all, cols_all = unique // n_slots, unique % n_slots
+
+    # Paires déjà formées sur un autre sujet (que l'affinité favorise) : une seule relation par couple
+    mentee_positions = {int(user_id): index for index, user_id in enumerate(mentee_ids)}
+    mentor_positions = {int(user_id): index for index, user_id in enumerate(mentor_ids)}
+    existing = np.array([
+        mentee_positions[pair.sponsored_id] * len(mentor_ids) + mentor_positions[pair.mentor_id]
+        for pair in history
+        if pair.sponsored_id in mentee_positions and pair.mentor_id in mentor_positions
+    ], dtype=np.int64)
+    allowed = ~np.isin(rows_all * len(mentor_ids) + slot_mentor[cols_all], existing)
+    rows_all, cols_all = rows_all[allowed], cols_all[allowed]
+    if len(rows_all) == 0:
+        report["unmatched"] = mentee_ids.tolist()
+        report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return report
+    costs = slot_cost[cols_all] - AFFINITY_WEIGHT * np.asarray(affinity[rows_all, slot_mentor[cols_all]]).ravel()
+
+    # Les poids nuls sont ignorés par SciPy : coûts décalés pour être strictement positifs
+    shift = 1 - costs.min()
+    costs = costs + shift
+    graph = csr_matrix(
+        (
+            np.concatenate([costs, np.full(n_mentees, UNMATCHED_COST)]),
+            (np.concatenate([rows_all, np.arange(n_mentees)]), np.concatenate([cols_all, n_slots + np.arange(n_mentees)]))
+        ),
+        shape=(n_mentees, n_slots + n_mentees)
+    )
+    matched_rows, matched_cols = min_weight_full_bipartite_matching(graph)
+    assignment = np.empty(n_mentees, dtype=np.int64)
+    assignment[matched_rows] = matched_cols
+
+    matched = assignment < n_slots
+    pair_rows = np.flatnonzero(matched)
+    pair_mentors = mentor_ids[slot_mentor[assignment[matched]]]
+    pair_costs = np.asarray(graph[pair_rows, assignment[matched]]).ravel() - shift
+    pairs = [
+        {"mentor_id": int(mentor_id), "sponsored_id": int(mentee_ids[row]), "cost": round(float(cost), 4)}
+        for row, mentor_id, cost in zip(pair_rows, pair_mentors, pair_costs)
+    ]
+    report["pairs"] = pairs
+    report["unmatched"] = mentee_ids[~matched].tolist()
+
+    if pairs and not dry_run:
+        inserted = db.execute(insert(Mentoring).returning(Mentoring.id), [
+            {"mentor_id": pair["mentor_id"], "sponsored_id": pair["sponsored_id"], "subject": subject, "description": MATCHING_DESCRIPTION}
+            for pair in pairs
+        ]).scalars().all()
+        # Insertion hors unité de travail ORM : journal des modifications et caches traités ici
+        record_changes(db.connection(), Mentoring, ChangeOperation.insert, inserted)
+        db.commit()
+        dashboard_cache.invalidate({user_id for pair in pairs for user_id in (pair["mentor_id"], pair["sponsored_id"])})
+        mentoring_graph.invalidate()
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Attribution automatique des mentors")
+    parser.add_argument("subject")
+    parser.add_argument("mentee_level")
+    parser.add_argument("mentor_levels", nargs="+")
+    parser.add_argument("--capacity", type=int, default=3)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        result = match_mentors(session, args.subject, args.mentee_level, args.mentor_levels, args.capacity, dry_run=args.dry_run)
+    finally:
+        session.close()
+    result["pairs"] = len(result["pairs"])
+    print(json.dumps(result, ensure_ascii=False, indent=2))
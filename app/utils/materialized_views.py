@@ -0,0 +1,111 @@
+"""
+Vues matérialisées des tableaux de bord (salles et événements)
+
+Les vues sont créées par la migration ``0004`` et rafraîchies avec
+``REFRESH MATERIALIZED VIEW CONCURRENTLY`` par le planificateur, dès que leur
+âge dépasse ``MV_MAX_AGE_SECONDS`` ou que les tables sources ont subi plus de
+``MV_REFRESH_THRESHOLD`` modifications depuis le dernier rafraîchissement.
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Table, MetaData, Column, Integer, String, Date, BigInteger, text
+from sqlalchemy.orm import Session
+
+from app.models.materialized_view_refresh import MaterializedViewRefresh
+
+# Nombre de lignes insérées/modifiées/supprimées déclenchant un rafraîchissement anticipé
+MV_REFRESH_THRESHOLD = int(os.getenv("MV_REFRESH_THRESHOLD", "500"))
+# Âge maximal d'une vue avant rafraîchissement
+MV_MAX_AGE_SECONDS = int(os.getenv("MV_MAX_AGE_SECONDS", "900"))
+
+# Métadonnées séparées : ces vues ne doivent pas être créées par create_all ni par l'autogénération
+views_metadata = MetaData()
+
+classroom_daily_affluence = Table(
+    "classroom_daily_affluence",
+    views_metadata,
+    Column("classroom_id", Integer),
+    Column("classroom_name", String(100)),
+    Column("capacity", Integer),
+    Column("day", Date),
+    Column("presence_count", BigInteger),
+    Column("absence_count", BigInteger),
+)
+
+event_attendance_summary = Table(
+    "event_attendance_summary",
+    views_metadata,
+    Column("event_id", Integer),
+    Column("participant_count", BigInteger),
+    Column("cancelled_count", BigInteger),
+)
+
+# Vue -> tables sources surveillées
+MATERIALIZED_VIEWS: Dict[str, List[str]] = {
+    "classroom_daily_affluence": ["classrooms", "presences"],
+    "event_attendance_summary": ["events", "event_participations"],
+}
+
+
+def _source_modifications(db: Session, view_name: str) -> int:
+    """Nombre cumulé de lignes modifiées dans les tables sources d'une vue"""
+    return db.execute(
+        text(
+            "SELECT coalesce(sum(n_tup_ins + n_tup_upd + n_tup_del), 0) "
+            "FROM pg_stat_user_tables WHERE relname = ANY(:tables)"
+        ),
+        {"tables": MATERIALIZED_VIEWS[view_name]}
+    ).scalar()
+
+
+def refresh_view(db: Session, view_name: str) -> None:
+    """Rafraîchir une vue sans bloquer les lectures"""
+    if view_name not in MATERIALIZED_VIEWS:
+        raise ValueError(f"Vue matérialisée inconnue : {view_name}")
+
+    modifications = _source_modifications(db, view_name)
+    db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view_name}"))
+
+    log = db.query(MaterializedViewRefresh).filter(MaterializedViewRefresh.view_name == view_name).first()
+    if log is None:
+        log = MaterializedViewRefresh(view_name=view_name)
+        db.add(log)
+    log.refreshed_at = datetime.now(timezone.utc)
+    log.source_modifications = modifications
+    db.commit()
+
+
+def refresh_stale_views(db: Session) -> List[str]:
+    """Rafraîchir les vues trop anciennes ou dont les sources ont trop changé"""
+    logs = {log.view_name: log for log in db.query(MaterializedViewRefresh).all()}
+    now = datetime.now(timezone.utc)
+    refreshed = []
+
+    for view_name in MATERIALIZED_VIEWS:
+        log = logs.get(view_name)
+        if log is not None:
+            age = (now - log.refreshed_at).total_seconds()
+            # Un compteur inférieur au précédent signifie une remise à zéro des statistiques
+            changes = _source_modifications(db, view_name) - log.source_modifications
+            if age < MV_MAX_AGE_SECONDS and 0 <= changes < MV_REFRESH_THRESHOLD:
+                continue
+        refresh_view(db, view_name)
+        refreshed.append(view_name)
+
+    return refreshed
+
+
+def view_freshness(db: Session, view_name: str) -> Dict[str, Any]:
+    """Date du dernier rafraîchissement et âge des données d'une vue"""
+    refreshed_at: Optional[datetime] = db.query(MaterializedViewRefresh.refreshed_at).filter(
+        MaterializedViewRefresh.view_name == view_name
+    ).scalar()
+    if refreshed_at is None:
+        return {"data_as_of": None, "data_age_seconds": None}
+    return {
+        "data_as_of": refreshed_at,
+        "data_age_seconds": round((datetime.now(timezone.utc) - refreshed_at).total_seconds(), 1)
+    }
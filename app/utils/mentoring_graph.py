@@ -0,0 +1,273 @@
+"""
+Requêtes sur le graphe de mentorat (mentor -> parrainé)
+
+- chaînes : mentors des mentors (``ancestors``) ou parrainés des parrainés
+  (``descendants``) jusqu'à une profondeur donnée, par une CTE récursive ;
+- charge des mentors : répartition du nombre de parrainés par mentor ;
+- cycles : chaînes qui reviennent à leur point de départ.
+
+Avec ``MENTORING_GRAPH_INDEX=true``, ces parcours sont faits sur des listes
+d'adjacence gardées en mémoire, reconstruites en arrière-plan après toute
+écriture validée sur ``mentoring`` ou ``users`` dans ce processus, et au plus
+tard toutes les ``MENTORING_GRAPH_TTL_SECONDS`` secondes.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.database import ReadSessionLocal
+from app.models.mentoring import Mentoring
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+MENTORING_GRAPH_INDEX = os.getenv("MENTORING_GRAPH_INDEX", "false").lower() == "true"
+MENTORING_GRAPH_TTL_SECONDS = float(os.getenv("MENTORING_GRAPH_TTL_SECONDS", "60"))
+MENTORING_GRAPH_MAX_DEPTH = 10
+MENTORING_TOP_MENTORS = 10
+
+
+class ChainDirection(str, Enum):
+    ancestors = "ancestors"
+    descendants = "descendants"
+
+
+# Colonne de départ et colonne d'arrivée d'une arête selon le sens de parcours
+_EDGE_COLUMNS = {
+    ChainDirection.descendants: ("mentor_id", "sponsored_id"),
+    ChainDirection.ancestors: ("sponsored_id", "mentor_id"),
+}
+
+
+def chain(db: Session, user_id: int, direction: ChainDirection, depth: int) -> List[Dict[str, Any]]:
+    """Utilisateurs atteints depuis ``user_id`` en au plus ``depth`` arêtes, à leur profondeur minimale"""
+    source, target = _EDGE_COLUMNS[direction]
+    # UNION (sans ALL) : une ligne (utilisateur, prédécesseur, profondeur) n'est produite qu'une fois ;
+    # la profondeur maximale arrête les cycles
+    rows = db.execute(text(f"""
+        WITH RECURSIVE walk(user_id, via_id, depth) AS (
+            SELECT {target}, {source}, 1 FROM mentoring WHERE {source} = :user_id
+            UNION
+            SELECT m.{target}, m.{source}, w.depth + 1
+            FROM walk w JOIN mentoring m ON m.{source} = w.user_id
+            WHERE w.depth < :depth
+        )
+        SELECT * FROM (
+            SELECT DISTINCT ON (w.user_id) w.user_id AS id, u.name, u.level, w.depth, w.via_id
+            FROM walk w JOIN users u ON u.id = w.user_id
+            WHERE w.user_id <> :user_id
+            ORDER BY w.user_id, w.depth, w.via_id
+        ) nodes
+        ORDER BY depth, id
+    """), {"user_id": user_id, "depth": depth}).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def load_distribution(db: Session, top: int = MENTORING_TOP_MENTORS) -> Dict[str, Any]:
+    """Répartition du nombre de parrainés par mentor et mentors les plus sollicités"""
+    buckets = db.execute(text("""
+        SELECT mentees, count(*) AS mentors
+        FROM (SELECT count(*) AS mentees FROM mentoring GROUP BY mentor_id) loads
+        GROUP BY mentees ORDER BY mentees
+    """)).all()
+    top_mentors = db.execute(text("""
+        SELECT u.id, u.name, loads.mentees
+        FROM (SELECT mentor_id, count(*) AS mentees FROM mentoring GROUP BY mentor_id) loads
+        JOIN users u ON u.id = loads.mentor_id
+        ORDER BY loads.mentees DESC, u.id
+        LIMIT :top
+    """), {"top": top}).mappings().all()
+    return _load_summary(
+        {row.mentees: row.mentors for row in buckets},
+        [dict(row) for row in top_mentors]
+    )
+
+
+def _load_summary(buckets: Dict[int, int], top_mentors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    mentors = sum(buckets.values())
+    pairs = sum(mentees * count for mentees, count in buckets.items())
+    return {
+        "mentors": mentors,
+        "pairs": pairs,
+        "max_mentees": max(buckets, default=0),
+        "average_mentees": round(pairs / mentors, 2) if mentors else 0,
+        "distribution": [{"mentees": mentees, "mentors": count} for mentees, count in sorted(buckets.items())],
+        "top_mentors": top_mentors,
+    }
+
+
+def find_cycles(db: Session, max_length: int, limit: int) -> Tuple[List[List[int]], bool]:
+    """Cycles d'au plus ``max_length`` utilisateurs, chacun commençant par son plus petit identifiant"""
+    # Chaque cycle n'est parcouru qu'à partir de son plus petit identifiant, en ne visitant que des identifiants supérieurs
+    rows = db.execute(text("""
+        WITH RECURSIVE walk(start_id, user_id, path, closed) AS (
+            SELECT mentor_id, sponsored_id, ARRAY[mentor_id, sponsored_id], false
+            FROM mentoring WHERE sponsored_id > mentor_id
+            UNION ALL
+            SELECT w.start_id, m.sponsored_id, w.path || m.sponsored_id, m.sponsored_id = w.start_id
+            FROM walk w JOIN mentoring m ON m.mentor_id = w.user_id
+            WHERE NOT w.closed
+              AND (m.sponsored_id = w.start_id
+                   OR (cardinality(w.path) < :max_length AND m.sponsored_id > w.start_id AND m.sponsored_id <> ALL(w.path)))
+        )
+        SELECT path[1:cardinality(path) - 1] AS cycle FROM walk WHERE closed ORDER BY path LIMIT :limit
+    """), {"max_length": max_length, "limit": limit + 1}).scalars().all()
+    return [list(cycle) for cycle in rows[:limit]], len(rows) > limit
+
+
+class _Snapshot:
+    def __init__(self, edges: List[Tuple[int, int]], users: Dict[int, Tuple[str, str]]):
+        self.users = users
+        self.neighbours: Dict[ChainDirection, Dict[int, List[int]]] = {
+            ChainDirection.descendants: {},
+            ChainDirection.ancestors: {},
+        }
+        for mentor_id, sponsored_id in sorted(edges):
+            self.neighbours[ChainDirection.descendants].setdefault(mentor_id, []).append(sponsored_id)
+            self.neighbours[ChainDirection.ancestors].setdefault(sponsored_id, []).append(mentor_id)
+        for adjacency in self.neighbours.values():
+            for targets in adjacency.values():
+                targets.sort()
+
+
+class MentoringGraph:
+    """Listes d'adjacence du graphe de mentorat, mêmes résultats que les requêtes SQL"""
+
+    def __init__(self, ttl: float = MENTORING_GRAPH_TTL_SECONDS):
+        self.ttl = ttl
+        self._snapshot: Optional[_Snapshot] = None
+        self._built_at = 0.0
+        # Une écriture incrémente la version ; le graphe est à jour si sa version de construction est la dernière
+        self._version = 0
+        self._built_version = -1
+        self._build_lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._version += 1
+
+    def _is_stale(self) -> bool:
+        return self._built_version != self._version or time.monotonic() - self._built_at > self.ttl
+
+    def rebuild(self) -> None:
+        """Recharger toutes les arêtes et remplacer le graphe d'un bloc"""
+        version = self._version
+        db = ReadSessionLocal()
+        try:
+            edges = db.query(Mentoring.mentor_id, Mentoring.sponsored_id).all()
+            members = {user_id for edge in edges for user_id in edge}
+            users = {
+                row.id: (row.name, row.level)
+                for row in db.query(User.id, User.name, User.level).filter(User.id.in_(members))
+            } if members else {}
+        finally:
+            db.close()
+
+        self._snapshot = _Snapshot([tuple(edge) for edge in edges], users)
+        self._built_at = time.monotonic()
+        self._built_version = version
+
+    def _rebuild_in_background(self) -> None:
+        if not self._build_lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception("Échec de la reconstruction du graphe de mentorat")
+            finally:
+                self._build_lock.release()
+
+        threading.Thread(target=run, name="mentoring-graph-rebuild", daemon=True).start()
+
+    def _current(self) -> _Snapshot:
+        if self._snapshot is None:
+            # Premier parcours : construction synchrone
+            with self._build_lock:
+                if self._snapshot is None:
+                    self.rebuild()
+        elif self._is_stale():
+            # Le graphe précédent reste servi pendant la reconstruction
+            self._rebuild_in_background()
+        return self._snapshot
+
+    def chain(self, user_id: int, direction: ChainDirection, depth: int) -> List[Dict[str, Any]]:
+        snapshot = self._current()
+        adjacency = snapshot.neighbours[direction]
+        # Parcours en largeur par niveau ; le prédécesseur retenu est le plus petit identifiant
+        found: Dict[int, Tuple[int, int]] = {}
+        frontier = [user_id]
+        for level in range(1, depth + 1):
+            reached: Dict[int, int] = {}
+            for via_id in frontier:
+                for target in adjacency.get(via_id, ()):
+                    if target != user_id and target not in found:
+                        reached[target] = min(reached.get(target, via_id), via_id)
+            if not reached:
+                break
+            for target, via_id in reached.items():
+                found[target] = (level, via_id)
+            frontier = sorted(reached)
+        return [
+            {"id": target, "name": snapshot.users[target][0], "level": snapshot.users[target][1], "depth": level, "via_id": via_id}
+            for target, (level, via_id) in sorted(found.items(), key=lambda item: (item[1][0], item[0]))
+            if target in snapshot.users
+        ]
+
+    def load_distribution(self, top: int = MENTORING_TOP_MENTORS) -> Dict[str, Any]:
+        snapshot = self._current()
+        loads = {
+            mentor_id: len(targets)
+            for mentor_id, targets in snapshot.neighbours[ChainDirection.descendants].items()
+            if mentor_id in snapshot.users
+        }
+        ranked = sorted(loads.items(), key=lambda item: (-item[1], item[0]))[:top]
+        return _load_summary(
+            dict(Counter(loads.values())),
+            [{"id": mentor_id, "name": snapshot.users[mentor_id][0], "mentees": mentees} for mentor_id, mentees in ranked]
+        )
+
+    def find_cycles(self, max_length: int, limit: int) -> Tuple[List[List[int]], bool]:
+        adjacency = self._current().neighbours[ChainDirection.descendants]
+        cycles: List[List[int]] = []
+        # Même énumération que la requête SQL : depuis le plus petit identifiant, vers des identifiants supérieurs
+        for start_id in sorted(adjacency):
+            stack = [(start_id, [start_id])]
+            while stack:
+                user_id, path = stack.pop()
+                for target in reversed(adjacency.get(user_id, ())):
+                    if target == start_id and len(path) > 1:
+                        cycles.append(path)
+                    elif len(path) < max_length and target > start_id and target not in path:
+                        stack.append((target, path + [target]))
+        cycles.sort()
+        return cycles[:limit], len(cycles) > limit
+
+
+mentoring_graph = MentoringGraph()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_graph_writes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, (Mentoring, User)) for obj in itertools.chain(session.new, session.dirty, session.deleted)):
+        session.info["mentoring_graph_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_graph_on_commit(session: Session) -> None:
+    if session.info.pop("mentoring_graph_changed", False):
+        mentoring_graph.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_graph_writes_on_rollback(session: Session) -> None:
+    session.info.pop("mentoring_graph_changed", None)
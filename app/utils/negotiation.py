@@ -0,0 +1,138 @@
+"""
+Format MessagePack négocié (``Accept`` / ``Content-Type: application/msgpack``)
+
+Les routes déclarées avec ``NegotiatedRoute`` acceptent des corps de requête
+MessagePack, validés par les mêmes schémas Pydantic que le JSON, et répondent
+en MessagePack aux clients qui le préfèrent à JSON dans ``Accept``. Le contenu
+encodé est celui que FastAPI aurait renvoyé en JSON (mêmes schémas, dates ISO
+8601) : seul l'encodage change. Sans en-tête explicite, rien ne change.
+"""
+
+import json
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import msgpack
+from fastapi import HTTPException, Request, status
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.responses import Response
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack"}
+
+# Format demandé par la requête en cours (positionné par NegotiatedRoute)
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """MessagePack est-il demandé explicitement, avec une préférence au moins égale à JSON ?"""
+    msgpack_quality, json_quality = 0.0, 0.0
+    for item in accept.split(","):
+        media_type, _, params = item.strip().partition(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in _MSGPACK_MEDIA_TYPES:
+            msgpack_quality = max(msgpack_quality, quality)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_quality = max(json_quality, quality)
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, use_bin_type=True)
+
+
+def _is_msgpack(content_type: str) -> bool:
+    return content_type.split(";", 1)[0].strip().lower() in _MSGPACK_MEDIA_TYPES
+
+
+class NegotiatedResponse(JSONResponse):
+    """Réponse JSON, ou MessagePack si la requête en cours le demande"""
+
+    def render(self, content: Any) -> bytes:
+        if _wants_msgpack.get():
+            # Appelé avant l'initialisation des en-têtes : le Content-Type suit
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return packb(content)
+        return super().render(content)
+
+
+class _MsgPackRequest(Request):
+    """Corps MessagePack présenté à FastAPI comme un corps JSON déjà décodé"""
+
+    def __init__(self, scope, receive):
+        headers = [(name, value) for name, value in scope["headers"] if name != b"content-type"]
+        super().__init__({**scope, "headers": headers + [(b"content-type", b"application/json")]}, receive)
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                # Clés entières admises (ex. capacités par identifiant de mentor)
+                self._json = msgpack.unpackb(await self.body(), raw=False, strict_map_key=False)
+            except (ValueError, msgpack.UnpackException):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Corps MessagePack invalide"
+                )
+        return self._json
+
+
+class NegotiatedRoute(APIRoute):
+    """Route acceptant et produisant du MessagePack en plus du JSON"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            if _is_msgpack(request.headers.get("content-type", "")):
+                request = _MsgPackRequest(request.scope, request.receive)
+            token = _wants_msgpack.set(prefers_msgpack(request.headers.get("accept", "")))
+            try:
+                response = await handler(request)
+            finally:
+                _wants_msgpack.reset(token)
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return negotiated_handler
+
+
+def transcode(body: bytes, content_type: str, accept: str) -> Optional[Tuple[bytes, str]]:
+    """Corps JSON ou MessagePack déjà encodé, réencodé dans le format demandé (None : inchangé)"""
+    if not body:
+        return None
+    wants_msgpack = prefers_msgpack(accept)
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if wants_msgpack and media_type == "application/json":
+        return packb(json.loads(body)), MSGPACK_MEDIA_TYPE
+    if not wants_msgpack and media_type in _MSGPACK_MEDIA_TYPES:
+        return json.dumps(msgpack.unpackb(body, raw=False, strict_map_key=False), ensure_ascii=False, separators=(",", ":")).encode(), "application/json"
+    return None
+
+
+def _negotiated_error(request: Request, response: Response) -> Response:
+    converted = transcode(response.body, response.headers.get("content-type", ""), request.headers.get("accept", ""))
+    if converted is None:
+        return response
+    body, media_type = converted
+    headers: Dict[str, str] = {name: value for name, value in response.headers.items() if name not in ("content-length", "content-type")}
+    return Response(body, status_code=response.status_code, headers=headers, media_type=media_type)
+
+
+async def negotiated_http_exception_handler(request: Request, exc: StarletteHTTPException) -> Response:
+    return _negotiated_error(request, await http_exception_handler(request, exc))
+
+
+async def negotiated_validation_exception_handler(request: Request, exc: RequestValidationError) -> Response:
+    return _negotiated_error(request, await request_validation_exception_handler(request, exc))
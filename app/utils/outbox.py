@@ -0,0 +1,200 @@
+"""
+Journal des modifications (outbox transactionnelle)
+
+Toute écriture sur les entités suivies (utilisateurs, événements, salles,
+présences, mentorat, participations) ajoute une ligne à la table ``outbox``
+dans la même transaction : la modification et sa trace sont validées ou
+annulées ensemble. Les écritures de l'ORM sont relevées à la fin de chaque
+flush ; les écritures directes (présences groupées, import CSV, attribution
+des mentors) appellent ``record_changes``. La ligne publiée est lue en base
+après l'écriture (valeurs par défaut comprises), sans les colonnes sensibles.
+
+Le flux ``GET /changes`` parcourt le journal dans l'ordre (transaction, id) en
+s'arrêtant aux transactions encore en cours : une transaction validée après une
+autre, avec des identifiants plus petits, ne peut pas être sautée par un curseur.
+La tâche ``relay_outbox`` publie les lignes non publiées par lots de
+``OUTBOX_RELAY_BATCH_SIZE`` vers ``OUTBOX_RELAY_URL`` (au moins une fois).
+"""
+
+import json
+import os
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, literal_column, text, tuple_
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.classroom import Classroom
+from app.models.event import Event
+from app.models.event_participation import EventParticipation
+from app.models.mentoring import Mentoring
+from app.models.outbox_record import OutboxRecord
+from app.models.presence import Presence
+from app.models.user import User
+
+OUTBOX_RELAY_URL = os.getenv("OUTBOX_RELAY_URL", "")
+OUTBOX_RELAY_BATCH_SIZE = int(os.getenv("OUTBOX_RELAY_BATCH_SIZE", "500"))
+OUTBOX_RELAY_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_RELAY_TIMEOUT_SECONDS", "10"))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+# Lots publiés au plus par exécution du relais (le reste attend l'exécution suivante)
+OUTBOX_RELAY_MAX_BATCHES = 20
+
+
+class ChangeEntity(str, Enum):
+    users = "users"
+    events = "events"
+    classrooms = "classrooms"
+    presences = "presences"
+    mentoring = "mentoring"
+    event_participations = "event_participations"
+
+
+class ChangeOperation(str, Enum):
+    insert = "insert"
+    update = "update"
+    delete = "delete"
+
+
+TRACKED_MODELS = {
+    User: ChangeEntity.users,
+    Event: ChangeEntity.events,
+    Classroom: ChangeEntity.classrooms,
+    Presence: ChangeEntity.presences,
+    Mentoring: ChangeEntity.mentoring,
+    EventParticipation: ChangeEntity.event_participations,
+}
+
+# Colonnes jamais publiées
+_EXCLUDED_COLUMNS = {
+    ChangeEntity.users: ["password"],
+    ChangeEntity.events: ["search_vector"],
+}
+
+# Plus ancienne transaction encore en cours : tout ce qui la précède est définitivement validé (ou annulé)
+_VISIBLE_HORIZON = literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def record_changes(connection: Connection, model: Any, operation: ChangeOperation, ids: Iterable[int]) -> None:
+    """Ajouter au journal les écritures ``operation`` sur les lignes ``ids`` de ``model`` (transaction en cours)"""
+    ids = sorted(set(ids))
+    if not ids:
+        return
+    entity = TRACKED_MODELS[model]
+    if operation is ChangeOperation.delete:
+        connection.execute(text(
+            "INSERT INTO outbox (entity, entity_id, operation) "
+            "SELECT :entity, id, :operation FROM unnest(CAST(:ids AS integer[])) AS id"
+        ), {"entity": entity.value, "operation": operation.value, "ids": ids})
+        return
+    # Ligne telle qu'enregistrée (valeurs par défaut et colonnes calculées comprises)
+    connection.execute(text(
+        f"INSERT INTO outbox (entity, entity_id, operation, payload) "
+        f"SELECT :entity, t.id, :operation, to_jsonb(t) - CAST(:excluded AS text[]) "
+        f"FROM {model.__tablename__} t WHERE t.id = ANY(:ids) ORDER BY t.id"
+    ), {"entity": entity.value, "operation": operation.value, "ids": ids, "excluded": _EXCLUDED_COLUMNS.get(entity, [])})
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session: Session, flush_context) -> None:
+    # Les listes new/dirty/deleted et l'historique des attributs reflètent encore ce flush
+    changes: Dict[Tuple[Any, ChangeOperation], List[int]] = {}
+    for operation, objects in (
+        (ChangeOperation.insert, session.new),
+        (ChangeOperation.update, session.dirty),
+        (ChangeOperation.delete, session.deleted),
+    ):
+        for obj in objects:
+            model = type(obj)
+            if model not in TRACKED_MODELS:
+                continue
+            # Objet seulement rattaché à une collection modifiée : aucune colonne n'a changé
+            if operation is ChangeOperation.update and not session.is_modified(obj, include_collections=False):
+                continue
+            # Objets insérés : clé d'identité attribuée après ce flush, identifiant déjà chargé
+            state = inspect(obj)
+            changes.setdefault((model, operation), []).append(state.identity[0] if state.identity else obj.id)
+    if changes:
+        connection = session.connection()
+        for (model, operation), ids in changes.items():
+            record_changes(connection, model, operation, ids)
+
+
+def read_changes(
+    db: Session,
+    after: Optional[Tuple[int, int]],
+    limit: int,
+    entity: Optional[ChangeEntity] = None
+) -> List[OutboxRecord]:
+    """Lignes du journal qui suivent la position ``(txid, id)``, transactions terminées uniquement"""
+    query = db.query(OutboxRecord).filter(OutboxRecord.txid < _VISIBLE_HORIZON)
+    if after is not None:
+        query = query.filter(tuple_(OutboxRecord.txid, OutboxRecord.id) > tuple_(*after))
+    if entity is not None:
+        query = query.filter(OutboxRecord.entity == entity.value)
+    return query.order_by(OutboxRecord.txid, OutboxRecord.id).limit(limit).all()
+
+
+def serialize_record(record: OutboxRecord) -> Dict[str, Any]:
+    return {
+        "id": record.id,
+        "entity": record.entity,
+        "entity_id": record.entity_id,
+        "operation": record.operation,
+        "payload": record.payload,
+        "created_at": record.created_at.isoformat(),
+    }
+
+
+def post_batch(records: List[Dict[str, Any]]) -> None:
+    """Publier un lot vers ``OUTBOX_RELAY_URL`` (une erreur HTTP lève une exception)"""
+    body = json.dumps({"changes": records}, ensure_ascii=False).encode()
+    request = urllib.request.Request(
+        OUTBOX_RELAY_URL, data=body, method="POST", headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=OUTBOX_RELAY_TIMEOUT_SECONDS) as response:
+        response.read()
+
+
+def relay(
+    db: Session,
+    publish: Callable[[List[Dict[str, Any]]], None] = post_batch,
+    batch_size: int = OUTBOX_RELAY_BATCH_SIZE,
+    max_batches: int = OUTBOX_RELAY_MAX_BATCHES
+) -> int:
+    """Publier les lignes non publiées par lots ; retourne le nombre de lignes publiées"""
+    published = 0
+    for _ in range(max_batches):
+        # Lignes verrouillées jusqu'au COMMIT : un autre relais passe aux suivantes
+        records = db.query(OutboxRecord).filter(
+            OutboxRecord.published_at.is_(None)
+        ).order_by(OutboxRecord.txid, OutboxRecord.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not records:
+            break
+        try:
+            publish([serialize_record(record) for record in records])
+        except Exception:
+            # Lot non marqué : republié à la prochaine exécution
+            db.rollback()
+            raise
+        db.query(OutboxRecord).filter(
+            OutboxRecord.id.in_([record.id for record in records])
+        ).update({"published_at": func.now()}, synchronize_session=False)
+        db.commit()
+        published += len(records)
+        if len(records) < batch_size:
+            break
+    return published
+
+
+def prune(db: Session, retention_days: int = OUTBOX_RETENTION_DAYS) -> int:
+    """Supprimer les lignes plus anciennes que la rétention (déjà publiées, s'il y a un relais)"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    query = db.query(OutboxRecord).filter(OutboxRecord.created_at < cutoff)
+    if OUTBOX_RELAY_URL:
+        query = query.filter(OutboxRecord.published_at.isnot(None))
+    deleted = query.delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,33 @@
+"""
+Pagination par clé (keyset)
+
+Le curseur renvoyé au client est opaque : il encode les valeurs de tri de la
+dernière ligne de la page, à partir desquelles la page suivante reprend avec
+une condition sur ``(tri, id)`` servie par un index, au lieu
+d'un ``OFFSET`` qui relit toutes les lignes précédentes.
+"""
+
+import base64
+import json
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encoder les valeurs de tri de la dernière ligne d'une page"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, **converters: Callable[[Any], Any]) -> Dict[str, Any]:
+    """Décoder un curseur reçu du client et convertir ses valeurs (400 s'il est invalide)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        return {name: convert(values[name]) for name, convert in converters.items()}
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide"
+        )
@@ -0,0 +1,181 @@
+"""
+Durée maximale des requêtes SQL et annulation à la déconnexion du client
+
+Les sessions ouvertes par ``get_db`` et ``get_read_db`` reçoivent un
+``statement_timeout`` selon la classe de la route (voir
+``app.utils.admission.classify``) : ``STATEMENT_TIMEOUT_<CLASSE>_MS``, 0 pour
+ne pas limiter. Il est posé au début de chaque transaction
+(``set_config(..., true)``) et disparaît avec elle : la connexion rendue au
+pool garde ses réglages par défaut. Les tâches de fond et scripts ne sont pas
+concernés.
+
+Pour les lectures (GET, HEAD), ``QueryCancellationMiddleware`` surveille la
+connexion du client : s'il se déconnecte avant la réponse, les requêtes SQL en
+cours de ses sessions sont annulées côté serveur (``cancel()`` de psycopg2,
+équivalent de ``pg_cancel_backend``) au lieu d'occuper une connexion du pool
+jusqu'à leur terme. Une requête interrompue (délai ou annulation) reçoit 503.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Set
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.admission import SAFE_METHODS, RouteClass, classify
+from app.utils.negotiation import negotiated_http_exception_handler
+
+STATEMENT_TIMEOUTS_MS = {
+    RouteClass.critical: int(os.getenv("STATEMENT_TIMEOUT_CRITICAL_MS", "2000")),
+    RouteClass.write: int(os.getenv("STATEMENT_TIMEOUT_WRITE_MS", "5000")),
+    RouteClass.read: int(os.getenv("STATEMENT_TIMEOUT_READ_MS", "5000")),
+    RouteClass.analytics: int(os.getenv("STATEMENT_TIMEOUT_ANALYTICS_MS", "15000")),
+}
+QUERY_CANCEL_ON_DISCONNECT = os.getenv("QUERY_CANCEL_ON_DISCONNECT", "true").lower() == "true"
+QUERY_TIMEOUT_RETRY_AFTER_SECONDS = 5
+
+SCOPE_KEY = "query_canceller"
+# SQLSTATE query_canceled : statement_timeout dépassé ou annulation
+_QUERY_CANCELED = "57014"
+
+
+class QueryCanceller:
+    """Connexions en cours d'utilisation par une requête HTTP, annulables depuis un autre thread"""
+
+    def __init__(self):
+        self._connections: Set[Any] = set()
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self.finished = False
+
+    def attach(self, dbapi_connection: Any) -> bool:
+        """Suivre la connexion (False : client déjà parti, rien ne doit y être exécuté)"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._connections.add(dbapi_connection)
+            return True
+
+    def detach(self, dbapi_connection: Any) -> None:
+        with self._lock:
+            self._connections.discard(dbapi_connection)
+
+    def finish(self) -> None:
+        """Réponse envoyée : plus rien à annuler"""
+        with self._lock:
+            self.finished = True
+
+    def cancel(self) -> None:
+        """Annuler les requêtes en cours (bloquant : à appeler hors de la boucle d'événements)"""
+        # Annulation sous le verrou : une connexion détachée, peut-être déjà reprise par une autre
+        # requête HTTP, n'est jamais annulée
+        with self._lock:
+            if self.finished or self.cancelled:
+                return
+            self.cancelled = True
+            for dbapi_connection in self._connections:
+                _cancel(dbapi_connection)
+
+
+def _cancel(dbapi_connection: Any) -> None:
+    try:
+        dbapi_connection.cancel()
+    except Exception:
+        # Connexion fermée entre-temps : rien à annuler
+        pass
+
+
+def configure_session(db: Session, request: Request) -> None:
+    """Appliquer à la session les limites de la requête HTTP qui l'utilise"""
+    timeout = STATEMENT_TIMEOUTS_MS.get(classify(request.method, request.url.path), 0)
+    if timeout > 0:
+        db.info["statement_timeout"] = timeout
+    canceller = request.scope.get(SCOPE_KEY)
+    if canceller is not None:
+        db.info[SCOPE_KEY] = canceller
+        db.info["dbapi_connections"] = set()
+
+
+def release_session(db: Session) -> None:
+    """Retirer les connexions de la session de la liste des annulables (avant sa fermeture)"""
+    canceller = db.info.get(SCOPE_KEY)
+    if canceller is not None:
+        for dbapi_connection in db.info.pop("dbapi_connections", ()):
+            canceller.detach(dbapi_connection)
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_query_limits(session, transaction, connection):
+    canceller = session.info.get(SCOPE_KEY)
+    if canceller is not None:
+        dbapi_connection = connection.connection.dbapi_connection
+        if not canceller.attach(dbapi_connection):
+            # cancel() est sans effet sur une connexion inactive : la requête n'est pas envoyée
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Client déconnecté : requête abandonnée"
+            )
+        session.info["dbapi_connections"].add(dbapi_connection)
+    timeout = session.info.get("statement_timeout")
+    if timeout:
+        # Local à la transaction : la connexion rendue au pool retrouve ses réglages
+        connection.execute(text("SELECT set_config('statement_timeout', :timeout, true)"), {"timeout": f"{timeout}ms"})
+
+
+async def query_canceled_handler(request: Request, exc: OperationalError):
+    """503 pour une requête SQL interrompue (délai dépassé ou client déconnecté)"""
+    if getattr(exc.orig, "pgcode", None) != _QUERY_CANCELED:
+        raise exc
+    return await negotiated_http_exception_handler(request, HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="La requête a dépassé la durée d'exécution autorisée",
+        headers={"Retry-After": str(QUERY_TIMEOUT_RETRY_AFTER_SECONDS)}
+    ))
+
+
+class QueryCancellationMiddleware:
+    """Annuler les requêtes SQL des lectures dont le client s'est déconnecté"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in SAFE_METHODS or not QUERY_CANCEL_ON_DISCONNECT:
+            await self.app(scope, receive, send)
+            return
+        canceller = QueryCanceller()
+        scope[SCOPE_KEY] = canceller
+        # Messages du client lus en continu pour voir la déconnexion, puis transmis à l'application
+        messages: "asyncio.Queue[Message]" = asyncio.Queue()
+
+        async def watch() -> None:
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    # cancel() de psycopg2 est bloquant (nouvelle connexion au serveur) : hors de la
+                    # boucle, et hors du pool de threads des routes, qui peut être saturé par les
+                    # requêtes mêmes à annuler
+                    await asyncio.get_running_loop().run_in_executor(None, canceller.cancel)
+                    return
+
+        async def relayed_receive() -> Message:
+            return await messages.get()
+
+        async def send_until_done(message: Message) -> None:
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Le serveur signale aussi la fin de la réponse comme une déconnexion
+                canceller.finish()
+            await send(message)
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await self.app(scope, relayed_receive, send_until_done)
+        finally:
+            canceller.finish()
+            watcher.cancel()
@@ -0,0 +1,56 @@
+"""
+Cohérence « lire ses propres écritures » avec les réplicas en lecture
+
+Après une écriture réussie, le client reçoit un cookie (et un en-tête qu'il peut
+renvoyer) indiquant jusqu'à quand ses lectures doivent viser la base principale.
+"""
+
+import os
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Durée pendant laquelle un client qui vient d'écrire lit sur la base principale
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+COOKIE_NAME = "campus_read_primary_until"
+HEADER_NAME = "X-Read-Primary-Until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def wrote_recently(request: Request) -> bool:
+    """Le client a-t-il écrit dans la fenêtre de cohérence ?"""
+    marker = request.headers.get(HEADER_NAME) or request.cookies.get(COOKIE_NAME)
+    if not marker:
+        return False
+    try:
+        return float(marker) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """Marquer les réponses aux écritures réussies"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or READ_YOUR_WRITES_SECONDS <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_marker(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}"
+                headers = MutableHeaders(scope=message)
+                headers.append(HEADER_NAME, until)
+                headers.append(
+                    "Set-Cookie",
+                    f"{COOKIE_NAME}={until}; Max-Age={int(READ_YOUR_WRITES_SECONDS) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
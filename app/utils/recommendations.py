@@ -0,0 +1,133 @@
+"""
+Recommandation d'événements par similarité entre événements
+
+Le planificateur recalcule périodiquement la table ``event_similarities`` :
+la matrice creuse utilisateurs x événements des participations est normalisée
+par colonne, et son produit par elle-même donne la similarité cosinus de
+co-participation entre événements ; s'y ajoute ``EVENT_SIMILARITY_CATEGORY_WEIGHT``
+pour deux événements de même catégorie. Seuls les ``EVENT_SIMILARITY_TOP_K``
+plus proches voisins à venir de chaque événement sont conservés.
+
+À la requête, les recommandations d'un utilisateur sont la somme des scores
+des voisins des événements auxquels il participe, lus par la clé primaire :
+aucune jointure sur l'historique des participations.
+"""
+
+import csv
+import io
+import os
+from datetime import date, timedelta
+from typing import Any, List, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.event import Event
+from app.models.event_participation import EventParticipation
+from app.models.event_similarity import EventSimilarity
+from app.utils.materialized_views import event_attendance_summary
+
+EVENT_SIMILARITY_TOP_K = int(os.getenv("EVENT_SIMILARITY_TOP_K", "50"))
+EVENT_SIMILARITY_CATEGORY_WEIGHT = float(os.getenv("EVENT_SIMILARITY_CATEGORY_WEIGHT", "0.2"))
+# Événements passés encore pris en compte comme source de recommandations
+EVENT_SIMILARITY_HISTORY_DAYS = int(os.getenv("EVENT_SIMILARITY_HISTORY_DAYS", "365"))
+# Lignes de la matrice de similarité traitées à la fois (mémoire bornée)
+_CHUNK_ROWS = 1024
+
+
+def compute_similarities(db: Session) -> int:
+    """Recalculer les voisins de chaque événement ; retourne le nombre de paires enregistrées"""
+    today = date.today()
+    events = db.query(Event.id, Event.category, Event.date_start, Event.date_end).filter(
+        Event.date_end >= today - timedelta(days=EVENT_SIMILARITY_HISTORY_DAYS)
+    ).order_by(Event.id).all()
+    event_ids = np.array([event.id for event in events], dtype=np.int64)
+    # Voisins candidats : événements à venir, du plus proche au plus lointain
+    upcoming = np.array(
+        sorted((index for index, event in enumerate(events) if event.date_end >= today), key=lambda index: events[index].date_start),
+        dtype=np.int64
+    )
+
+    rows: List[Tuple[int, int, float]] = []
+    if len(upcoming):
+        positions = {int(event_id): index for index, event_id in enumerate(event_ids)}
+        participations = db.query(EventParticipation.user_id, EventParticipation.event_id).filter(
+            EventParticipation.is_attending == True,
+            EventParticipation.event_id.in_(select(Event.id).where(Event.date_end >= today - timedelta(days=EVENT_SIMILARITY_HISTORY_DAYS)))
+        ).all()
+        users = {user_id: index for index, user_id in enumerate({row.user_id for row in participations})}
+        matrix = csr_matrix(
+            (
+                np.ones(len(participations), dtype=np.float32),
+                ([users[row.user_id] for row in participations], [positions[row.event_id] for row in participations])
+            ),
+            shape=(len(users), len(event_ids))
+        )
+        # Colonnes normalisées : le produit donne directement la similarité cosinus
+        norms = np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+        norms[norms == 0] = 1
+        normalized = csr_matrix(matrix.multiply(1 / norms[None, :]))
+        co_participation = (normalized.T @ normalized[:, upcoming]).tocsr()
+
+        categories = np.unique([event.category for event in events], return_inverse=True)[1]
+        # Départage des égalités (même catégorie sans co-participation) : l'événement le plus proche d'abord
+        proximity = -1e-6 * np.arange(len(upcoming)) / len(upcoming)
+        top_k = min(EVENT_SIMILARITY_TOP_K, len(upcoming))
+
+        for start in range(0, len(event_ids), _CHUNK_ROWS):
+            stop = min(start + _CHUNK_ROWS, len(event_ids))
+            scores = co_participation[start:stop].toarray()
+            scores += EVENT_SIMILARITY_CATEGORY_WEIGHT * (categories[start:stop, None] == categories[upcoming][None, :])
+            scores += proximity
+            # Un événement n'est pas son propre voisin
+            own = np.flatnonzero((upcoming >= start) & (upcoming < stop))
+            scores[upcoming[own] - start, own] = 0
+            best = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            keep = best_scores > 0
+            sources = np.broadcast_to(event_ids[start:stop, None], best.shape)[keep]
+            rows.extend(zip(sources.tolist(), event_ids[upcoming[best[keep]]].tolist(), np.round(best_scores[keep], 6).tolist()))
+
+    # Remplacement complet dans une seule transaction : les lectures voient l'ancienne table jusqu'au COMMIT
+    db.execute(text("DELETE FROM event_similarities"))
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert("COPY event_similarities (event_id, similar_event_id, score) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    db.commit()
+    return len(rows)
+
+
+def recommend_events(db: Session, user_id: int, limit: int) -> List[Tuple[Any, float]]:
+    """Événements à venir recommandés à ``user_id`` avec leur score"""
+    attended = select(EventParticipation.event_id).where(
+        EventParticipation.user_id == user_id,
+        EventParticipation.is_attending == True
+    )
+    score = func.sum(EventSimilarity.score).label("score")
+    recommended = db.query(Event, score).join(
+        EventSimilarity, EventSimilarity.similar_event_id == Event.id
+    ).filter(
+        EventSimilarity.event_id.in_(attended),
+        Event.id.notin_(attended),
+        Event.date_end >= date.today()
+    ).group_by(Event.id).order_by(score.desc(), Event.date_start, Event.id).limit(limit).all()
+    if recommended:
+        return [(event, float(value)) for event, value in recommended]
+
+    # Démarrage à froid (aucune participation) : événements à venir les plus suivis
+    popular = db.query(Event).outerjoin(
+        event_attendance_summary, event_attendance_summary.c.event_id == Event.id
+    ).filter(
+        Event.date_end >= date.today(),
+        Event.id.notin_(attended)
+    ).order_by(
+        func.coalesce(event_attendance_summary.c.participant_count, 0).desc(), Event.date_start, Event.id
+    ).limit(limit).all()
+    return [(event, 0.0) for event in popular]
@@ -0,0 +1,229 @@
+"""
+Planificateur de tâches de fond (analyses lourdes, maintenance)
+
+Les tâches sont enregistrées avec une expression cron à 5 champs et tournent
+soit dans le processus de l'API (``SCHEDULER_ENABLED=true``), soit dans un
+worker dédié (``python worker.py``). Un verrou consultatif PostgreSQL garantit
+qu'une tâche ne s'exécute qu'une fois à la fois, quel que soit le nombre de
+processus ; chaque exécution est historisée dans la table ``job_runs``.
+"""
+
+import logging
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, get_engine
+from app.models.job_run import JobRun
+
+logger = logging.getLogger(__name__)
+
+# Démarrer le planificateur dans le processus de l'API
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() == "true"
+# Durée de conservation de l'historique des exécutions
+JOB_RUNS_RETENTION_DAYS = int(os.getenv("JOB_RUNS_RETENTION_DAYS", "30"))
+
+
+class CronSchedule:
+    """Expression cron classique : minute heure jour-du-mois mois jour-de-la-semaine"""
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Expression cron invalide : {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(part, low, high) for part, (low, high) in zip(parts, self.RANGES)
+        ]
+        # Sémantique cron : si jour du mois et jour de la semaine sont restreints, l'un OU l'autre suffit
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(value: str, low: int, high: int) -> Set[int]:
+        allowed: Set[int] = set()
+        for item in value.split(","):
+            step = 1
+            if "/" in item:
+                item, step_value = item.split("/")
+                step = int(step_value)
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = (int(bound) for bound in item.split("-"))
+            else:
+                start = end = int(item)
+            allowed.update(range(start, end + 1, step))
+        if high == 6 and 7 in allowed:
+            # 7 désigne aussi le dimanche
+            allowed.discard(7)
+            allowed.add(0)
+        if not allowed or min(allowed) < low or max(allowed) > high:
+            raise ValueError(f"Champ cron invalide : {value!r}")
+        return allowed
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.isoweekday() % 7) in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Prochaine échéance strictement postérieure à ``moment``"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Aucune échéance pour l'expression cron {self.expression!r}")
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[Session], Optional[str]]
+    schedule: CronSchedule
+    next_run: Optional[datetime] = None
+
+    @property
+    def lock_key(self) -> int:
+        """Clé du verrou consultatif PostgreSQL (stable entre processus)"""
+        return zlib.crc32(f"campus-job:{self.name}".encode())
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self._running: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, cron: str):
+        """Décorateur d'enregistrement d'une tâche ``func(db) -> message``"""
+        def decorator(func: Callable[[Session], Optional[str]]):
+            if name in self.jobs:
+                raise ValueError(f"Tâche déjà enregistrée : {name}")
+            self.jobs[name] = Job(name=name, func=func, schedule=CronSchedule(cron))
+            return func
+        return decorator
+
+    def run_job(self, name: str) -> Optional[JobRun]:
+        """Exécuter une tâche immédiatement, si aucun autre processus ne l'exécute.
+
+        Retourne l'exécution historisée, ou ``None`` si la tâche était déjà en cours.
+        """
+        job = self.jobs[name]
+        with self._lock:
+            if name in self._running:
+                return None
+            self._running.add(name)
+
+        try:
+            with get_engine().connect() as lock_connection:
+                if not self._try_lock(lock_connection, job):
+                    return None
+                try:
+                    return self._execute(job)
+                finally:
+                    self._unlock(lock_connection, job)
+        finally:
+            with self._lock:
+                self._running.discard(name)
+
+    @staticmethod
+    def _try_lock(connection, job: Job) -> bool:
+        if connection.dialect.name != "postgresql":
+            return True
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": job.lock_key}).scalar()
+        connection.commit()
+        return bool(acquired)
+
+    @staticmethod
+    def _unlock(connection, job: Job) -> None:
+        if connection.dialect.name != "postgresql":
+            return
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": job.lock_key})
+        connection.commit()
+
+    @staticmethod
+    def _execute(job: Job) -> JobRun:
+        db = SessionLocal()
+        try:
+            run = JobRun(job_name=job.name, status="running")
+            db.add(run)
+            db.commit()
+            db.refresh(run)
+
+            # La tâche travaille dans sa propre session pour ne pas mêler ses transactions à l'historique
+            job_db = SessionLocal()
+            try:
+                message = job.func(job_db)
+                run.status = "success"
+                run.message = message
+            except Exception as exc:
+                job_db.rollback()
+                logger.exception("Échec de la tâche %s", job.name)
+                run.status = "failed"
+                run.message = f"{type(exc).__name__}: {exc}"
+            finally:
+                job_db.close()
+
+            # Date avec fuseau : une date naïve serait lue dans le fuseau de la session PostgreSQL
+            run.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            db.refresh(run)
+            return run
+        finally:
+            db.close()
+
+    def run_pending(self, now: Optional[datetime] = None) -> None:
+        """Lancer, chacune dans son thread, les tâches arrivées à échéance"""
+        now = now or datetime.now()
+        for job in self.jobs.values():
+            if job.next_run is None:
+                job.next_run = job.schedule.next_after(now)
+            elif job.next_run <= now:
+                job.next_run = job.schedule.next_after(now)
+                threading.Thread(target=self.run_job, args=(job.name,), name=f"job-{job.name}", daemon=True).start()
+
+    def run_forever(self) -> None:
+        """Boucle principale : vérifie les échéances au début de chaque minute"""
+        self._stop.clear()
+        while not self._stop.is_set():
+            self.run_pending()
+            now = datetime.now()
+            self._stop.wait(60 - now.second - now.microsecond / 1_000_000)
+
+    def start(self) -> None:
+        """Démarrer la boucle dans un thread du processus courant"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run_forever, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+scheduler = Scheduler()
@@ -0,0 +1,135 @@
+"""
+Mutualisation des calculs identiques concurrents (single-flight)
+
+Quand plusieurs requêtes identiques arrivent en même temps, une seule exécute
+la requête SQL (dans le pool de threads) ; les autres attendent dans la boucle
+d'événements, sans bloquer de thread, et reçoivent le même résultat. Si le
+client de la première se déconnecte, sa requête SQL est annulée et le calcul
+est relancé pour les autres. Le
+résultat peut en plus être réutilisé pendant ``SINGLEFLIGHT_TTL_SECONDS``.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.query_limits import SCOPE_KEY
+
+# Durée de réutilisation d'un résultat déjà calculé (0 = partage des seuls calculs en cours)
+SINGLEFLIGHT_TTL_SECONDS = float(os.getenv("SINGLEFLIGHT_TTL_SECONDS", "0"))
+# Au-delà de ce nombre de clés mémorisées, les résultats expirés sont purgés
+_MAX_IDLE_KEYS = 1024
+
+
+class _Call:
+    def __init__(self):
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.expires_at = 0.0
+
+
+class SingleFlight:
+    """Calculs partagés ; seul le premier appelant occupe un thread, les suivants attendent dans la boucle d'événements"""
+
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self._calls: Dict[Hashable, _Call] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Any], abandoned: Optional[Callable[[], bool]] = None) -> Any:
+        """Exécuter ``func`` (dans le pool de threads) une seule fois pour tous les appelants concurrents de ``key``
+
+        ``abandoned`` indique si le premier appelant a été abandonné par son
+        client : son échec ne concerne alors que lui et le calcul est relancé
+        pour les appelants en attente.
+        """
+        while True:
+            call = self._calls.get(key)
+            if call is not None and call.future.done() and call.expires_at <= time.monotonic():
+                call = None
+            if call is None:
+                break
+            try:
+                # shield : un appelant qui abandonne n'interrompt pas le calcul partagé
+                return await asyncio.shield(call.future)
+            except asyncio.CancelledError:
+                if call.future.cancelled() and not asyncio.current_task().cancelling():
+                    # Premier appelant annulé ou abandonné (client déconnecté) : le calcul est relancé
+                    continue
+                raise
+
+        if len(self._calls) >= _MAX_IDLE_KEYS:
+            self._purge_expired()
+        call = _Call()
+        self._calls[key] = call
+        try:
+            result = await run_in_threadpool(func)
+            call.future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            call.future.cancel()
+            raise
+        except BaseException as exc:
+            if abandoned is not None and abandoned():
+                # Requête SQL annulée pour le seul premier appelant : les autres relancent le calcul
+                call.future.cancel()
+                raise
+            call.future.set_exception(exc)
+            # Exception remontée par l'appelant lui-même : pas d'avertissement « jamais récupérée »
+            call.future.exception()
+            raise
+        finally:
+            failed = call.future.cancelled() or call.future.exception() is not None
+            call.expires_at = time.monotonic() + (self.ttl if not failed else 0.0)
+            if (self.ttl <= 0 or failed) and self._calls.get(key) is call:
+                del self._calls[key]
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, call in self._calls.items() if call.future.done() and call.expires_at <= now]:
+            del self._calls[key]
+
+
+def _normalize(value: Any) -> Hashable:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(_normalize(item) for item in value))
+    return value
+
+
+def _request_key(func: Callable, kwargs: Dict[str, Any]) -> Tuple:
+    """Clé : route + paramètres normalisés (la session SQL n'en fait pas partie)"""
+    params = tuple(sorted(
+        (name, _normalize(value))
+        for name, value in kwargs.items()
+        if not isinstance(value, Session)
+    ))
+    return (func.__module__, func.__qualname__, params)
+
+
+def _client_gone(kwargs: Dict[str, Any]) -> bool:
+    """Client déconnecté : ses sessions SQL sont annulées (voir ``app.utils.query_limits``)"""
+    return any(
+        isinstance(value, Session) and getattr(value.info.get(SCOPE_KEY), "cancelled", False)
+        for value in kwargs.values()
+    )
+
+
+def coalesce(ttl: Optional[float] = None):
+    """Décorateur de route : les appels identiques concurrents partagent un seul calcul"""
+    def decorator(func: Callable):
+        flight = SingleFlight(SINGLEFLIGHT_TTL_SECONDS if ttl is None else ttl)
+
+        # Route asynchrone : les appelants en attente n'occupent pas de thread du pool
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await flight.do(
+                _request_key(func, kwargs), lambda: func(*args, **kwargs), lambda: _client_gone(kwargs)
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+"""
+Index en mémoire pour la recherche d'utilisateurs (typeahead)
+
+Avec ``USER_SEARCH_INDEX=true``, ``GET /users/search`` est servi par des listes
+triées de clés en minuscules (début du nom, email, autres mots du nom)
+parcourues par dichotomie, sans aller-retour SQL. L'index est reconstruit en
+arrière-plan après toute écriture validée sur ``users`` dans ce processus, et
+au plus tard toutes les ``USER_INDEX_TTL_SECONDS`` secondes pour tenir compte
+des écritures des autres processus.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import ReadSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+USER_SEARCH_INDEX = os.getenv("USER_SEARCH_INDEX", "false").lower() == "true"
+USER_INDEX_TTL_SECONDS = float(os.getenv("USER_INDEX_TTL_SECONDS", "60"))
+USER_SEARCH_MAX_RESULTS = 20
+
+# Listes triées (clé, id), dans l'ordre de pertinence : début du nom, de l'email, d'un autre mot du nom
+_KINDS = ("name", "email", "word")
+
+
+class _Snapshot:
+    def __init__(self, keys: Dict[str, List[str]], ids: Dict[str, List[int]], users: Dict[int, Dict[str, Any]]):
+        self.keys = keys
+        self.ids = ids
+        self.users = users
+
+
+class UserPrefixIndex:
+    def __init__(self, ttl: float = USER_INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._snapshot: Optional[_Snapshot] = None
+        self._built_at = 0.0
+        # Une écriture incrémente la version ; l'index est à jour si sa version de construction est la dernière
+        self._version = 0
+        self._built_version = -1
+        self._build_lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._version += 1
+
+    def _is_stale(self) -> bool:
+        return self._built_version != self._version or time.monotonic() - self._built_at > self.ttl
+
+    def rebuild(self) -> None:
+        """Recharger tous les utilisateurs et remplacer l'index d'un bloc"""
+        version = self._version
+        db = ReadSessionLocal()
+        try:
+            rows = db.query(User.id, User.name, User.email, User.level).all()
+        finally:
+            db.close()
+
+        entries: Dict[str, List[Tuple[str, int]]] = {kind: [] for kind in _KINDS}
+        users = {}
+        for row in rows:
+            users[row.id] = {"id": row.id, "name": row.name, "email": row.email, "level": row.level}
+            words = row.name.lower().split()
+            entries["name"].append((row.name.lower(), row.id))
+            entries["email"].append((row.email.lower(), row.id))
+            entries["word"].extend((word, row.id) for word in words[1:])
+        for kind in _KINDS:
+            entries[kind].sort()
+
+        self._snapshot = _Snapshot(
+            {kind: [key for key, _ in entries[kind]] for kind in _KINDS},
+            {kind: [user_id for _, user_id in entries[kind]] for kind in _KINDS},
+            users
+        )
+        self._built_at = time.monotonic()
+        self._built_version = version
+
+    def _rebuild_in_background(self) -> None:
+        if not self._build_lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception("Échec de la reconstruction de l'index des utilisateurs")
+            finally:
+                self._build_lock.release()
+
+        threading.Thread(target=run, name="user-index-rebuild", daemon=True).start()
+
+    def _current(self) -> _Snapshot:
+        if self._snapshot is None:
+            # Première recherche : construction synchrone
+            with self._build_lock:
+                if self._snapshot is None:
+                    self.rebuild()
+        elif self._is_stale():
+            # L'index précédent reste servi pendant la reconstruction
+            self._rebuild_in_background()
+        return self._snapshot
+
+    def search(self, q: str, limit: int) -> List[Dict[str, Any]]:
+        """Utilisateurs dont le nom, l'email ou un mot du nom commence par ``q``"""
+        snapshot = self._current()
+        prefix = q.strip().lower()
+        found: Dict[int, Dict[str, Any]] = {}
+        for kind in _KINDS:
+            keys, ids = snapshot.keys[kind], snapshot.ids[kind]
+            position = bisect_left(keys, prefix)
+            while position < len(keys) and len(found) < limit and keys[position].startswith(prefix):
+                found.setdefault(ids[position], snapshot.users[ids[position]])
+                position += 1
+            if len(found) >= limit:
+                break
+        return list(found.values())
+
+
+user_index = UserPrefixIndex()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_user_writes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, User) for obj in itertools.chain(session.new, session.dirty, session.deleted)):
+        session.info["users_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop("users_changed", False):
+        user_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session: Session) -> None:
+    session.info.pop("users_changed", None)
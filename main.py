@@ -1,27 +1,82 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine
+from sqlalchemy.exc import OperationalError
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from app.database import get_engine, dispose_engine
 from app.models import User, Event, Mentoring, Classroom, Presence, EventParticipation
-from app.routes import users, events, mentoring, auth, classrooms, presences, event_participations
+from app.routes import users, events, mentoring, auth, classrooms, presences, event_participations, admin, me, changes
+from app.utils.scheduler import scheduler, SCHEDULER_ENABLED
+from app.utils.read_your_writes import ReadYourWritesMiddleware
+from app.utils.idempotency import IdempotencyMiddleware
+from app.utils.compression import CompressionMiddleware
+from app.utils.admission import AdmissionControlMiddleware
+from app.utils.query_limits import QueryCancellationMiddleware, query_canceled_handler
+from app.utils.negotiation import (
+    NegotiatedResponse,
+    NegotiatedRoute,
+    negotiated_http_exception_handler,
+    negotiated_validation_exception_handler
+)
+from app.utils.group_commit import presence_batcher
+
+# Le schéma de la base est géré uniquement par Alembic (alembic upgrade head) :
+# l'import de ce module n'ouvre aucune connexion
 
-# Créer les tables dans la base de données
-from app.database import Base
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """Démarrage et arrêt de l'API"""
+    get_engine()
+    if SCHEDULER_ENABLED:
+        from app.utils import jobs  # enregistre les tâches
+        scheduler.start()
+    yield
+    scheduler.stop()
+    presence_batcher.stop()
+    dispose_engine()
 
 # Créer l'application FastAPI
 app = FastAPI(
     title="Campus Life API",
     description="API pour gérer la vie dans un campus d'étudiants - événements et mentorat",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Réponses en JSON, ou en MessagePack pour les clients qui le demandent (Accept: application/msgpack)
+    default_response_class=NegotiatedResponse,
+    exception_handlers={
+        StarletteHTTPException: negotiated_http_exception_handler,
+        RequestValidationError: negotiated_validation_exception_handler,
+        OperationalError: query_canceled_handler,
+    }
 )
+app.router.route_class = NegotiatedRoute
+
+# Réponses rejouées sur Idempotency-Key (au plus près des routes : les en-têtes CORS et le
+# marqueur de lecture sur la base principale s'appliquent aussi aux réponses rejouées)
+app.add_middleware(IdempotencyMiddleware)
+
+# Annuler les requêtes SQL des lectures dont le client s'est déconnecté
+app.add_middleware(QueryCancellationMiddleware)
+
+# Marquer les clients qui viennent d'écrire pour qu'ils relisent sur la base principale
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Compression des réponses (au plus près du client : les réponses rejouées sont compressées aussi)
+app.add_middleware(CompressionMiddleware)
+
+# Contrôle d'admission (avant le reste : une requête délestée ne coûte presque rien)
+app.add_middleware(AdmissionControlMiddleware)
 
-# Configuration CORS
+# Configuration CORS (en premier : les préflights ne passent pas par l'admission et les
+# réponses délestées portent les en-têtes CORS, le navigateur peut lire Retry-After)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # En production, spécifiez les domaines autorisés
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 # Inclure les routes
@@ -32,6 +87,9 @@ app.include_router(mentoring.router)
 app.include_router(classrooms.router)
 app.include_router(presences.router)
 app.include_router(event_participations.router)
+app.include_router(admin.router)
+app.include_router(me.router)
+app.include_router(changes.router)
 
 @app.get("/")
 def read_root():
@@ -47,6 +105,9 @@ def read_root():
             "classrooms": "/classrooms",
             "presences": "/presences",
             "event-participations": "/event-participations",
+            "admin": "/admin",
+            "me": "/me",
+            "changes": "/changes",
             "docs": "/docs"
         }
     }
@@ -0,0 +1,37 @@
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.models.user import User
+
+
+@pytest.fixture
+def db():
+    """Session sur la base de test (DATABASE_URL), annulée en fin de test"""
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        session.execute(text("SELECT 1"))
+    except OperationalError:
+        session.close()
+        pytest.skip("PostgreSQL indisponible")
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Créer un utilisateur au nom unique, visible de la seule session du test"""
+    def make(level: str) -> User:
+        suffix = uuid.uuid4().hex[:12]
+        user = User(name=f"Test {suffix}", email=f"{suffix}@test.campus", password="x", level=level)
+        db.add(user)
+        db.flush()
+        return user
+    return make
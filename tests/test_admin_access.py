@@ -0,0 +1,70 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+import main
+from app.models.user import User
+
+CSV_USERS = "name,email,password,level\nImport,import@test.campus,pw,L1\n"
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def new_email(db):
+    """Adresses uniques ; les comptes créés par l'API avec ces adresses sont supprimés en fin de test"""
+    emails = []
+
+    def make() -> str:
+        emails.append(f"{uuid.uuid4().hex[:12]}@test.campus")
+        return emails[-1]
+    yield make
+    db.execute(delete(User).where(User.email.in_(emails)))
+    db.commit()
+
+
+def _login(client, email):
+    response = client.post("/auth/login-json", json={"email": email, "password": "pw"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.parametrize("path", ["/auth/register", "/users/"])
+@pytest.mark.parametrize("level", ["admin", " Admin "])
+def test_admin_level_cannot_be_self_assigned(client, new_email, path, level):
+    email = new_email()
+    response = client.post(path, json={"name": "Intrus", "email": email, "password": "pw", "level": level})
+
+    assert response.status_code == 422
+
+
+def test_self_registered_user_is_forbidden_on_admin_import(client, new_email):
+    email = new_email()
+    response = client.post("/auth/register", json={"name": "Intrus", "email": email, "password": "pw", "level": "L1"})
+    assert response.status_code == 201, response.text
+    headers = _login(client, email)
+
+    assert client.put("/auth/me", json={"level": "admin"}, headers=headers).status_code == 403
+    assert client.put(f"/users/{response.json()['id']}", json={"level": "admin"}).status_code == 422
+    response = client.post(
+        "/admin/import/users", files={"file": ("users.csv", CSV_USERS, "text/csv")}, headers=headers
+    )
+
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize("level", [1, None, ["admin"], {"name": "admin"}])
+def test_non_string_level_on_profile_update_is_rejected(client, new_email, level):
+    email = new_email()
+    response = client.post("/auth/register", json={"name": "Intrus", "email": email, "password": "pw", "level": "L1"})
+    assert response.status_code == 201, response.text
+    headers = _login(client, email)
+
+    assert client.put("/auth/me", json={"level": level}, headers=headers).status_code == 422
+    assert client.get("/auth/me", headers=headers).json()["level"] == "L1"
@@ -0,0 +1,46 @@
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+
+import main
+from app.utils.admission import AdmissionControlMiddleware, RouteClass
+
+
+async def _ok(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+def _saturated_client():
+    """Admission sans place libre en lecture, derrière la même configuration CORS que l'application"""
+    admission = AdmissionControlMiddleware(_ok, limits={RouteClass.read: 1}, max_wait=0)
+    assert admission.limiters[RouteClass.read].try_acquire()
+    cors = CORSMiddleware(
+        admission, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], expose_headers=["Retry-After"]
+    )
+    return TestClient(cors)
+
+
+def test_cors_wraps_admission_control():
+    middleware = [entry.cls for entry in main.app.user_middleware]
+
+    assert middleware.index(CORSMiddleware) < middleware.index(AdmissionControlMiddleware)
+
+
+def test_shed_response_carries_cors_headers():
+    response = _saturated_client().get("/classrooms/", headers={"Origin": "https://campus.example"})
+
+    assert response.status_code == 503
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert "retry-after" in response.headers["access-control-expose-headers"].lower()
+    assert response.headers["retry-after"]
+
+
+def test_options_is_never_shed():
+    client = _saturated_client()
+    preflight = client.options("/classrooms/", headers={
+        "Origin": "https://campus.example", "Access-Control-Request-Method": "GET"
+    })
+    plain = client.options("/classrooms/")
+
+    assert preflight.status_code == 200
+    assert plain.status_code == 200
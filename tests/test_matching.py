@@ -0,0 +1,41 @@
+import uuid
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.mentoring import Mentoring
+from app.schemas import MatchingRequest
+from app.utils.matching import match_mentors
+
+
+def test_existing_pair_on_another_subject_is_not_matched_again(db, make_user):
+    mentee_level, mentor_level = f"E{uuid.uuid4().hex[:8]}", f"M{uuid.uuid4().hex[:8]}"
+    mentee = make_user(mentee_level)
+    current_mentor = make_user(mentor_level)
+    other_mentor = make_user(mentor_level)
+    # L'affinité de sujets favorise le mentor actuel du parrainé
+    db.add(Mentoring(mentor_id=current_mentor.id, sponsored_id=mentee.id, subject="Mathématiques"))
+    db.flush()
+
+    report = match_mentors(db, "Algorithmique", mentee_level, [mentor_level], capacity=3, dry_run=True)
+
+    assert [(pair["mentor_id"], pair["sponsored_id"]) for pair in report["pairs"]] == [(other_mentor.id, mentee.id)]
+
+
+def test_mentee_whose_only_mentor_is_already_paired_stays_unmatched(db, make_user):
+    mentee_level, mentor_level = f"E{uuid.uuid4().hex[:8]}", f"M{uuid.uuid4().hex[:8]}"
+    mentee = make_user(mentee_level)
+    mentor = make_user(mentor_level)
+    db.add(Mentoring(mentor_id=mentor.id, sponsored_id=mentee.id, subject="Mathématiques"))
+    db.flush()
+
+    report = match_mentors(db, "Algorithmique", mentee_level, [mentor_level], capacity=3, dry_run=True)
+
+    assert report["pairs"] == []
+    assert report["unmatched"] == [mentee.id]
+
+
+@pytest.mark.parametrize("capacity", [-1, 51, 1000000])
+def test_per_mentor_capacity_is_bounded(capacity):
+    with pytest.raises(ValidationError):
+        MatchingRequest(subject="Algorithmique", mentee_level="L1", mentor_levels=["M1"], capacities={12: capacity})
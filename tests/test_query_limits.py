@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+from starlette.requests import Request
+
+from app.utils.query_limits import (
+    SCOPE_KEY,
+    QueryCanceller,
+    QueryCancellationMiddleware,
+    configure_session,
+    release_session
+)
+
+SCOPE = {"type": "http", "method": "GET", "path": "/presences/analytics/heatmap", "headers": []}
+
+
+class SlowCancelConnection:
+    """Connexion DBAPI factice dont cancel() bloque comme PQcancel"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.cancelled_from = None
+
+    def cancel(self):
+        self.cancelled_from = threading.current_thread()
+        time.sleep(self.delay)
+
+
+def test_disconnect_cancels_queries_without_blocking_the_event_loop():
+    connection = SlowCancelConnection(0.5)
+
+    async def app(scope, receive, send):
+        scope[SCOPE_KEY].attach(connection)
+        await asyncio.sleep(0.6)
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    async def main():
+        # Écart maximal entre deux tours de boucle pendant l'annulation
+        longest_gap = 0.0
+        last = time.perf_counter()
+        task = asyncio.create_task(QueryCancellationMiddleware(app)(dict(SCOPE), receive, send))
+        while not task.done():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            longest_gap, last = max(longest_gap, now - last), now
+        await task
+        return longest_gap
+
+    longest_gap = asyncio.run(main())
+
+    assert connection.cancelled_from not in (None, threading.main_thread())
+    assert longest_gap < 0.2
+
+
+def test_transaction_begun_after_disconnect_sends_no_query(db):
+    from app.database import SessionLocal, get_engine
+
+    canceller = QueryCanceller()
+    canceller.cancel()
+    session = SessionLocal()
+    configure_session(session, Request({**SCOPE, "query_string": b"", SCOPE_KEY: canceller}))
+    checked_out = get_engine().pool.checkedout()
+    try:
+        with pytest.raises(HTTPException) as raised:
+            session.execute(text("SELECT pg_sleep(5)"))
+    finally:
+        release_session(session)
+        session.close()
+
+    assert raised.value.status_code == 503
+    assert get_engine().pool.checkedout() == checked_out
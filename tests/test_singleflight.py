@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.utils.query_limits import SCOPE_KEY, QueryCanceller
+from app.utils.singleflight import coalesce
+
+
+def _session(canceller: QueryCanceller) -> Session:
+    session = Session()
+    session.info[SCOPE_KEY] = canceller
+    return session
+
+
+def test_leader_disconnect_reruns_the_query_for_waiting_callers():
+    leader_canceller = QueryCanceller()
+    leader_started, release_leader = threading.Event(), threading.Event()
+    sessions = []
+
+    @coalesce(ttl=0)
+    def heatmap(db: Session):
+        sessions.append(db)
+        if len(sessions) == 1:
+            leader_started.set()
+            release_leader.wait(5)
+            # Ce que psycopg2 lève quand QueryCanceller.cancel() interrompt la requête
+            raise OperationalError("SELECT ...", {}, Exception("canceling statement due to user request"))
+        return {"cells": []}
+
+    async def main():
+        leader = asyncio.create_task(heatmap(db=_session(leader_canceller)))
+        while not leader_started.is_set():
+            await asyncio.sleep(0.01)
+        follower = asyncio.create_task(heatmap(db=_session(QueryCanceller())))
+        await asyncio.sleep(0.05)
+        leader_canceller.cancel()
+        release_leader.set()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader_result, follower_result = asyncio.run(main())
+
+    assert isinstance(leader_result, OperationalError)
+    assert follower_result == {"cells": []}
+    assert len(sessions) == 2
+
+
+def test_query_failure_of_a_connected_leader_is_shared():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    @coalesce(ttl=0)
+    def heatmap(db: Session):
+        calls.append(db)
+        started.set()
+        release.wait(5)
+        raise OperationalError("SELECT ...", {}, Exception("canceling statement due to statement timeout"))
+
+    async def main():
+        leader = asyncio.create_task(heatmap(db=_session(QueryCanceller())))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        follower = asyncio.create_task(heatmap(db=_session(QueryCanceller())))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, OperationalError) for result in results)
+    assert len(calls) == 1
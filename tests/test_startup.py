@@ -0,0 +1,79 @@
+"""
+Budget de démarrage : import à froid de l'application et première requête
+
+Chaque mesure est faite dans un processus neuf (imports à froid). La base
+pointée par DATABASE_URL est injoignable : l'import ne doit ouvrir aucune
+connexion.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Budgets larges : ils détectent un import lourd ou une connexion au démarrage, pas une variation de machine
+IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET_SECONDS", "5"))
+FIRST_REQUEST_BUDGET_SECONDS = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET_SECONDS", "1"))
+
+ROOT = Path(__file__).resolve().parent.parent
+UNREACHABLE_DATABASE_URL = "postgresql://nobody@127.0.0.1:1/unreachable"
+
+IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+import app.database as database
+print(json.dumps({
+    "elapsed": elapsed,
+    "engine_created": database._engine is not None,
+    "heavy_modules": sorted(name for name in ("numpy", "scipy", "pandas") if name in sys.modules),
+}))
+"""
+
+FIRST_REQUEST_SCRIPT = """
+import json, time
+import main
+import app.database as database
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+
+# Moteur factice : toute connexion ouverte pendant le démarrage ou la requête est comptée
+engine = create_engine("sqlite://")
+connections = []
+event.listen(engine, "connect", lambda *args: connections.append(1))
+database._engine = engine
+database._session_factory.configure(bind=engine)
+
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    response = client.get("/health")
+    elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "status": response.status_code, "connections": len(connections)}))
+"""
+
+
+def _run(script: str) -> dict:
+    env = {**os.environ, "DATABASE_URL": UNREACHABLE_DATABASE_URL, "SCHEDULER_ENABLED": "false"}
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cold_import_is_fast_and_opens_no_connection():
+    report = _run(IMPORT_SCRIPT)
+
+    assert not report["engine_created"]
+    assert report["heavy_modules"] == []
+    assert report["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+def test_first_request_is_fast_against_stubbed_engine():
+    report = _run(FIRST_REQUEST_SCRIPT)
+
+    assert report["status"] == 200
+    assert report["connections"] == 0
+    assert report["elapsed"] < FIRST_REQUEST_BUDGET_SECONDS
@@ -0,0 +1,28 @@
+"""
+Worker des tâches de fond
+
+    python worker.py                     # boucle du planificateur
+    python worker.py <nom_de_la_tache>   # exécution immédiate d'une tâche
+"""
+
+import logging
+import sys
+
+from app.utils.jobs import scheduler
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    if len(sys.argv) > 1:
+        name = sys.argv[1]
+        if name not in scheduler.jobs:
+            print(f"Tâche inconnue : {name}. Tâches disponibles : {', '.join(sorted(scheduler.jobs))}")
+            sys.exit(1)
+        run = scheduler.run_job(name)
+        if run is None:
+            print(f"La tâche {name} est déjà en cours d'exécution")
+            sys.exit(1)
+        print(f"{name} : {run.status} - {run.message}")
+        sys.exit(0 if run.status == "success" else 1)
+
+    scheduler.run_forever()